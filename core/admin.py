@@ -1,22 +1,79 @@
 from django.contrib import admin
-from .models import Club, Semester, Event, Ranking, AuditLog
+from .models import Club, Semester, ScoringPolicy, Event, Ranking, RankingJob, AuditLog
 from django.utils.html import format_html
+from .services import defer_ranking
+
+class DeferredRankingMixin:
+    """
+    Recalculates rankings once per bulk action or delete instead of once per
+    affected event (e.g. "Delete selected events" or deleting a club).
+    """
+    def response_action(self, request, queryset):
+        with defer_ranking():
+            return super().response_action(request, queryset)
+
+    def delete_model(self, request, obj):
+        with defer_ranking():
+            super().delete_model(request, obj)
 
 @admin.register(Club)
-class ClubAdmin(admin.ModelAdmin):
+class ClubAdmin(DeferredRankingMixin, admin.ModelAdmin):
     list_display = ('name', 'short_code', 'faculty_incharge', 'student_lead')
     search_fields = ('name', 'short_code')
 
 @admin.register(Semester)
-class SemesterAdmin(admin.ModelAdmin):
-    list_display = ('name', 'is_active')
+class SemesterAdmin(DeferredRankingMixin, admin.ModelAdmin):
+    list_display = ('name', 'is_active', 'scoring_policy')
     list_editable = ('is_active',)
+    list_select_related = ('scoring_policy',)
+
+@admin.register(ScoringPolicy)
+class ScoringPolicyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'version', 'tier_a_min', 'tier_b_min', 'tier_c_min', 'min_events', 'updated_at')
+    readonly_fields = ('version', 'updated_at')
+    fieldsets = (
+        (None, {
+            'fields': ('name', 'version', 'updated_at')
+        }),
+        ('CPS weights', {
+            'fields': ('planning_weight', 'execution_weight', 'documentation_weight', 'innovation_weight', 'turnout_weight'),
+            'description': 'CPS is the weighted sum of the five metric averages.'
+        }),
+        ('Tiers', {
+            'fields': ('tier_a_min', 'tier_b_min', 'tier_c_min', 'min_events'),
+            'description': 'Minimum CPS for each tier. Clubs with fewer events than the minimum stay Pending.'
+        }),
+    )
+
+class TotalScoreFilter(admin.SimpleListFilter):
+    title = 'total score'
+    parameter_name = 'total'
+
+    def lookups(self, request, model_admin):
+        return [('90', '90 and above'), ('75', '75 to 89'), ('60', '60 to 74'), ('0', 'Below 60')]
+
+    def queryset(self, request, queryset):
+        bounds = {'90': (90, None), '75': (75, 90), '60': (60, 75), '0': (None, 60)}
+        if self.value() not in bounds:
+            return queryset
+        low, high = bounds[self.value()]
+        # `total` is annotated in EventAdmin.get_queryset
+        if low is not None:
+            queryset = queryset.filter(total__gte=low)
+        if high is not None:
+            queryset = queryset.filter(total__lt=high)
+        return queryset
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(DeferredRankingMixin, admin.ModelAdmin):
     list_display = ('name', 'club', 'semester', 'date', 'total_score')
-    list_filter = ('semester', 'club')
+    list_filter = ('semester', 'club', TotalScoreFilter)
     search_fields = ('name', 'club__name')
+    list_select_related = ('club', 'semester')
+    # Newest first, on event_date_id_idx; ties on date need the id to page stably
+    ordering = ('-date', '-id')
+    # Skips the unfiltered COUNT(*) on every changelist page
+    show_full_result_count = False
     fieldsets = (
         (None, {
             'fields': ('club', 'semester', 'name', 'date')
@@ -30,6 +87,13 @@ class EventAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_total_score()
+
+    @admin.display(description='Total score', ordering='total')
+    def total_score(self, obj):
+        return obj.total
+
 @admin.register(Ranking)
 class RankingAdmin(admin.ModelAdmin):
     list_display = ('rank', 'club', 'semester', 'cps', 'tier', 'event_count')
@@ -42,11 +106,28 @@ class RankingAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False # Read-only in admin
 
+@admin.register(RankingJob)
+class RankingJobAdmin(admin.ModelAdmin):
+    list_display = ('club', 'semester', 'requested_at', 'claimed_at', 'attempts', 'last_error')
+    list_filter = ('semester',)
+    list_select_related = ('club', 'semester')
+
+    def has_add_permission(self, request):
+        return False # Queued by event saves
+
+    def has_change_permission(self, request, obj=None):
+        return False # Deleting a stuck job is allowed; verify_rankings repairs what it missed
+
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
-    list_display = ('timestamp', 'user', 'action', 'details_short')
-    readonly_fields = ('user', 'action', 'timestamp', 'details')
-    list_filter = ('action', 'user')
+    list_display = ('timestamp', 'user', 'action', 'club', 'details_short')
+    readonly_fields = ('user', 'action', 'timestamp', 'content_type', 'object_id', 'club', 'data', 'details')
+    # All indexed columns: action/timestamp, club FK and (content_type, object_id)
+    list_filter = ('action', 'club', 'content_type', 'user')
+    search_fields = ('=object_id',)
+    search_help_text = 'Exact ID of the audited object (e.g. an event ID with the content type filter).'
+    list_select_related = ('user', 'club')
+    ordering = ('-timestamp',)
 
     def details_short(self, obj):
         return obj.details[:50]
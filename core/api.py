@@ -0,0 +1,212 @@
+import datetime
+import functools
+import hashlib
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+from .caching import get_cached_ranking_rows, get_ranking_version
+from .jobs import ranking_pending_since
+from .models import Club, ClubHistory, Event, Semester
+from .scoring import METRICS
+from .snapshots import rankings_as_of
+from .views import EVENT_FIELDS, club_events_page, get_semester_choices, has_bearer_token
+
+RANKING_FIELDS = [
+    'rank', 'club_id', 'short_code', 'name', 'cps', 'tier', 'event_count',
+    *(f'avg_{metric}' for metric in METRICS),
+]
+# Ranking snapshots keep only these columns
+SNAPSHOT_FIELDS = ['rank', 'club_id', 'short_code', 'name', 'cps', 'tier', 'event_count']
+HISTORY_FIELDS = [
+    'semester_id', 'semester', 'cps', 'tier', 'rank', 'event_count',
+    'cps_change', 'tier_change', 'cps_moving_avg', 'tier_streak',
+]
+
+def api_view(view):
+    """
+    Wraps an API view: GET only, gzip, a session or `Authorization: Bearer
+    <CTR_API_TOKEN>`, and errors as JSON instead of HTML pages.
+    """
+    @require_GET
+    @gzip_page
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_authenticated or has_bearer_token(request, settings.CTR_API_TOKEN)):
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        try:
+            response = view(request, *args, **kwargs)
+        except BadRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Http404 as e:
+            return JsonResponse({'error': str(e) or 'Not found'}, status=404)
+        # Every client must revalidate, which is a 304 while the ETag holds
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
+
+def select_fields(request, available):
+    """
+    The fields requested with `?fields=`, in the order given (all of
+    `available` by default). Raises BadRequest for unknown fields.
+    """
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(available)
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown or not fields:
+        raise BadRequest(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+    return fields
+
+def make_etag(request, *parts):
+    """
+    An ETag over the parts that determine a response plus the query string
+    (fields, format, cursors), so each representation validates separately.
+    """
+    key = '|'.join(str(part) for part in (*parts, request.META.get('QUERY_STRING', '')))
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+def table(request, rows, fields, **extra):
+    """
+    Encodes `rows` (dicts) with only `fields`, as objects or, with
+    `format=compact`, as one array per row.
+    """
+    if request.GET.get('format') == 'compact':
+        data = {'fields': fields, 'rows': [[row[field] for field in fields] for row in rows]}
+    else:
+        data = {'results': [{field: row[field] for field in fields} for row in rows]}
+    return JsonResponse({**extra, **data}, json_dumps_params={'separators': (',', ':')})
+
+def conditional(request, etag, build):
+    """
+    Answers with 304 when the client already has `etag`, otherwise with the
+    response from `build()`.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = build()
+    response.headers['ETag'] = etag
+    return response
+
+def parse_as_of(value):
+    """
+    An `as_of` parameter: an ISO 8601 datetime (in the site's time zone
+    unless it has an offset) or a date, meaning the end of that day.
+    """
+    try:
+        # A bare date would also parse as a datetime, at midnight
+        day = parse_date(value)
+        when = datetime.datetime.combine(day, datetime.time.max) if day else parse_datetime(value)
+    except ValueError:
+        when = None
+    if when is None:
+        raise BadRequest("Invalid as_of; use an ISO 8601 date or datetime")
+    return timezone.make_aware(when) if timezone.is_naive(when) else when
+
+@api_view
+def semesters(request):
+    rows = list(Semester.objects.order_by('pk').values('id', 'name', 'is_active'))
+    return table(request, rows, select_fields(request, ['id', 'name', 'is_active']))
+
+@api_view
+def semester_rankings(request, semester_id):
+    """
+    A semester's ranking table. 304s and repeated reads of the same version
+    cost one query for the version (two with CTR_RANKING_QUEUE); the rows
+    come from the cache. With
+    `?as_of=`, the table as it stood then, replayed from its snapshots.
+    """
+    if 'as_of' in request.GET:
+        return semester_rankings_as_of(request, semester_id, parse_as_of(request.GET['as_of']))
+    fields = select_fields(request, RANKING_FIELDS)
+    version = get_ranking_version(semester_id)
+    if version is None:
+        raise Http404("Semester not found")
+    pending_since = ranking_pending_since(semester_id)
+    etag = make_etag(request, 'rankings', semester_id, version, pending_since)
+
+    def build():
+        rows = get_cached_ranking_rows(semester_id, version)
+        rows = [
+            {**row, 'short_code': row['club__short_code'], 'name': row['club__name']}
+            for row in rows
+        ]
+        return table(
+            request, rows, fields,
+            semester=semester_id, version=version, pending=pending_since is not None,
+        )
+    return conditional(request, etag, build)
+
+def semester_rankings_as_of(request, semester_id, when):
+    fields = select_fields(request, SNAPSHOT_FIELDS)
+    semester = get_object_or_404(Semester, pk=semester_id)
+    # Snapshots are only ever appended, and each one bumps the version
+    etag = make_etag(request, 'rankings-as-of', semester_id, semester.ranking_version)
+
+    def build():
+        rows = rankings_as_of(semester, when)
+        if rows is None:
+            raise Http404("No rankings were recorded for this semester by then")
+        return table(request, rows, fields, semester=semester_id, as_of=when.isoformat())
+    return conditional(request, etag, build)
+
+@api_view
+def club_detail(request, pk):
+    """
+    A club's details and its CPS, tier and rank in every semester, from the
+    ClubHistory table.
+    """
+    fields = select_fields(request, HISTORY_FIELDS)
+    club = get_object_or_404(Club.objects.only('name', 'short_code', 'faculty_incharge', 'student_lead'), pk=pk)
+    # History only changes when a semester is recalculated, which bumps its version
+    versions = Semester.objects.order_by('pk').values_list('pk', 'ranking_version')
+    etag = make_etag(
+        request, 'club', club.pk, club.name, club.short_code, club.faculty_incharge, club.student_lead,
+        *(f"{semester_id}:{version}" for semester_id, version in versions),
+    )
+
+    def build():
+        rows = [
+            {**row, 'semester': row['semester__name']}
+            for row in ClubHistory.objects.filter(club=club).order_by('semester_id').values(
+                *(field for field in HISTORY_FIELDS if field != 'semester'), 'semester__name'
+            )
+        ]
+        return table(
+            request, rows, fields,
+            club={
+                'id': club.pk, 'name': club.name, 'short_code': club.short_code,
+                'faculty_incharge': club.faculty_incharge, 'student_lead': club.student_lead,
+            },
+        )
+    return conditional(request, etag, build)
+
+@api_view
+def club_events(request, pk):
+    """
+    A club's events in a semester, one keyset page at a time:
+    ?semester=<id>&after=<cursor> (or before=<cursor>)&limit=<n>.
+    """
+    fields = select_fields(request, EVENT_FIELDS)
+    if not Club.objects.filter(pk=pk).exists():
+        raise Http404("Club not found")
+    semesters, semester = get_semester_choices(request.GET.get('semester'))
+
+    def build():
+        rows, previous_cursor, next_cursor = club_events_page(request, pk, semester)
+        return table(
+            request, rows, fields,
+            club=pk, semester=semester.pk if semester else None, previous=previous_cursor, next=next_cursor,
+        )
+    if semester is None:
+        return build()
+    # Saving or deleting an event recalculates its semester, which bumps the
+    # version, or queues the recalculation
+    etag = make_etag(request, 'events', pk, semester.pk, semester.ranking_version, ranking_pending_since(semester.pk))
+    return conditional(request, etag, build)
@@ -6,3 +6,4 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.services  # Register signals
+        import core.sqlite  # PRAGMA optimize after requests
@@ -0,0 +1,103 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.dispatch import receiver
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+class AuditBuffer:
+    """
+    In-process queue of unsaved AuditLog rows, written with bulk_create.
+
+    Entries are flushed when a request finishes, when `batch_size` entries
+    are waiting (by a background thread), every `flush_interval` seconds and
+    at interpreter shutdown. The queue is bounded: once `max_size` entries
+    are waiting, the caller adding the next one flushes synchronously, so
+    producers slow down instead of memory growing.
+    """
+    def __init__(self, batch_size, max_size, flush_interval):
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._entries = deque()
+        self._lock = threading.Lock()
+        # Keeps flushes in order when several threads flush at once
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+            size = len(self._entries)
+        if size >= self.max_size:
+            self.flush()
+        elif size >= self.batch_size:
+            self._wakeup.set()
+        self._ensure_thread()
+
+    def flush(self):
+        """
+        Writes every queued entry. Returns the number of rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries = list(self._entries)
+                self._entries.clear()
+            if not entries:
+                return 0
+            try:
+                AuditLog.objects.bulk_create(entries, batch_size=500)
+            except Exception:
+                # Put them back in front so nothing is lost; the next flush retries
+                with self._lock:
+                    self._entries.extendleft(reversed(entries))
+                raise
+            return len(entries)
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork, so each worker process starts its own
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush %d audit log entries", len(self))
+            finally:
+                close_old_connections()
+
+audit_buffer = AuditBuffer(
+    batch_size=settings.CTR_AUDIT_BATCH_SIZE,
+    max_size=settings.CTR_AUDIT_QUEUE_SIZE,
+    flush_interval=settings.CTR_AUDIT_FLUSH_INTERVAL,
+)
+
+@receiver(request_finished)
+def flush_after_request(sender, **kwargs):
+    # Runs once the response has been sent, so it doesn't add to save latency
+    try:
+        audit_buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush audit log entries")
+
+# Worker shutdown (gunicorn sends SIGTERM and the worker exits normally)
+atexit.register(audit_buffer.flush)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.db.models import BigIntegerField, F, Value
+from django.db.models.functions import Greatest
+from .models import Ranking, Semester, ranking_version_now
+
+# Cached ranking data lives for a day; stale versions simply age out
+RANKINGS_TIMEOUT = 60 * 60 * 24
+
+def get_ranking_version(semester_id):
+    """
+    Returns the current version of a semester's rankings, or None if there
+    is no such semester. Views that load the semester anyway read its
+    `ranking_version` instead.
+    """
+    return Semester.objects.filter(pk=semester_id).values_list('ranking_version', flat=True).first()
+
+def bump_ranking_version(semester_id):
+    """
+    Marks a semester's cached rankings as stale. Runs in the transaction that
+    changes them, so every process sees the new version together with the
+    new rankings.
+    """
+    Semester.objects.filter(pk=semester_id).update(
+        ranking_version=Greatest(F('ranking_version') + 1, Value(ranking_version_now(), output_field=BigIntegerField()))
+    )
+
+def get_cached_rankings(semester, version=None):
+    """
+    The semester's Ranking rows in dashboard order (with their clubs), cached
+    per ranking version.
+    """
+    if version is None:
+        version = semester.ranking_version
+    key = f'ctr:rankings:{semester.pk}:{version}'
+    rankings = cache.get(key)
+    if rankings is None:
+        rankings = list(
+            Ranking.objects.filter(semester=semester).select_related('club').only(
+                'rank', 'tier', 'cps', 'event_count', 'club__name', 'club__short_code'
+            # Sort NULL ranks (Pending) last
+            ).order_by(F('rank').asc(nulls_last=True), '-cps')
+        )
+        cache.set(key, rankings, RANKINGS_TIMEOUT)
+    return rankings
+
+# Ranking columns served by the JSON API
+RANKING_ROW_FIELDS = [
+    'rank', 'club_id', 'club__short_code', 'club__name', 'cps', 'tier', 'event_count',
+    'avg_planning', 'avg_execution', 'avg_documentation', 'avg_innovation', 'avg_turnout',
+]
+
+def get_cached_ranking_rows(semester_id, version=None):
+    """
+    The semester's rankings as plain dicts of RANKING_ROW_FIELDS in dashboard
+    order, cached per ranking version like get_cached_rankings.
+    """
+    if version is None:
+        version = get_ranking_version(semester_id)
+    key = f'ctr:ranking-rows:{semester_id}:{version}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(
+            Ranking.objects.filter(semester_id=semester_id).values(*RANKING_ROW_FIELDS)
+            .order_by(F('rank').asc(nulls_last=True), '-cps')
+        )
+        cache.set(key, rows, RANKINGS_TIMEOUT)
+    return rows
@@ -0,0 +1,95 @@
+from collections import deque
+from .models import Ranking, ClubHistory
+
+# Semesters in the CPS moving average
+HISTORY_WINDOW = 3
+# Tier order for tier_change; Pending has no place in it
+TIER_LEVELS = {'D': 0, 'C': 1, 'B': 2, 'A': 3}
+TREND_FIELDS = ['cps_change', 'tier_change', 'cps_moving_avg', 'tier_streak']
+
+def apply_trends(rows):
+    """
+    Fills the trend columns of one club's ClubHistory rows, which must be in
+    semester order. Returns the rows whose trend values changed.
+    """
+    changed = []
+    window = deque(maxlen=HISTORY_WINDOW)
+    previous = None
+    for row in rows:
+        old = [getattr(row, field) for field in TREND_FIELDS]
+        window.append(row.cps)
+        row.cps_moving_avg = sum(window) / len(window)
+        if previous is None:
+            row.cps_change = None
+            row.tier_change = None
+            row.tier_streak = 1
+        else:
+            row.cps_change = row.cps - previous.cps
+            if row.tier in TIER_LEVELS and previous.tier in TIER_LEVELS:
+                level_change = TIER_LEVELS[row.tier] - TIER_LEVELS[previous.tier]
+                row.tier_change = (level_change > 0) - (level_change < 0)
+            else:
+                row.tier_change = None
+            row.tier_streak = previous.tier_streak + 1 if row.tier == previous.tier else 1
+        if old != [getattr(row, field) for field in TREND_FIELDS]:
+            changed.append(row)
+        previous = row
+    return changed
+
+def update_club_history(semester, club_ids=None):
+    """
+    Copies a semester's Ranking rows for `club_ids` (every club when None)
+    into ClubHistory. Ranks are copied as they are; clubs whose CPS, tier or
+    event count changed, or whose ranking appeared or disappeared, get the
+    trend columns of all their semesters recomputed.
+
+    Returns what changed as {club_id: [rank, tier, cps, event_count]}, with
+    None for clubs that no longer have a ranking.
+    """
+    rankings = Ranking.objects.filter(semester=semester)
+    history = ClubHistory.objects.filter(semester=semester)
+    if club_ids is not None:
+        club_ids = set(club_ids)
+        if not club_ids:
+            return {}
+        rankings = rankings.filter(club_id__in=club_ids)
+        history = history.filter(club_id__in=club_ids)
+
+    existing = {row.club_id: row for row in history}
+    to_create = []
+    to_update = []
+    retrend = set()
+    changes = {}
+    for club_id, cps, tier, rank, event_count in rankings.values_list('club_id', 'cps', 'tier', 'rank', 'event_count'):
+        row = existing.pop(club_id, None)
+        if row is None or (row.cps, row.tier, row.rank, row.event_count) != (cps, tier, rank, event_count):
+            changes[club_id] = [rank, tier, cps, event_count]
+        if row is None:
+            to_create.append(ClubHistory(
+                club_id=club_id, semester=semester, cps=cps, tier=tier, rank=rank, event_count=event_count,
+                cps_moving_avg=cps,
+            ))
+            retrend.add(club_id)
+        elif (row.cps, row.tier, row.event_count) != (cps, tier, event_count):
+            row.cps, row.tier, row.rank, row.event_count = cps, tier, rank, event_count
+            to_update.append(row)
+            retrend.add(club_id)
+        elif row.rank != rank:
+            row.rank = rank
+            to_update.append(row)
+
+    # Whatever is left no longer has a ranking in this semester
+    if existing:
+        ClubHistory.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+        retrend.update(existing)
+        changes.update(dict.fromkeys(existing))
+    ClubHistory.objects.bulk_update(to_update, ['cps', 'tier', 'rank', 'event_count'], batch_size=500)
+    ClubHistory.objects.bulk_create(to_create, batch_size=500)
+
+    if retrend:
+        series = {}
+        for row in ClubHistory.objects.filter(club_id__in=retrend).order_by('club_id', 'semester_id'):
+            series.setdefault(row.club_id, []).append(row)
+        changed = [row for rows in series.values() for row in apply_trends(rows)]
+        ClubHistory.objects.bulk_update(changed, TREND_FIELDS, batch_size=500)
+    return changes
@@ -0,0 +1,78 @@
+import operator
+import uuid
+from datetime import timedelta
+from functools import reduce
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+from .models import RankingJob
+
+def enqueue_ranking_jobs(pairs):
+    """
+    Queues a recalculation for each (club_id, semester_id) pair, as part of
+    the current transaction. A pair that is already queued keeps its single
+    row with a new requested_at, so bursts of saves coalesce into one job.
+    """
+    now = timezone.now()
+    RankingJob.objects.bulk_create(
+        [RankingJob(club_id=club_id, semester_id=semester_id, requested_at=now) for club_id, semester_id in sorted(pairs)],
+        update_conflicts=True, unique_fields=['semester', 'club'], update_fields=['requested_at'],
+    )
+
+def claim_ranking_jobs(limit=100):
+    """
+    Claims up to `limit` of the oldest unclaimed jobs (or ones whose worker
+    stopped more than CTR_RANKING_JOB_TIMEOUT seconds ago) for this worker.
+    On PostgreSQL rows other workers are claiming are skipped, not waited
+    for (SKIP LOCKED); the claim token makes the claim exclusive everywhere.
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    claimable = RankingJob.objects.filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - timedelta(seconds=settings.CTR_RANKING_JOB_TIMEOUT))
+    )
+    with transaction.atomic():
+        candidates = claimable.order_by('requested_at')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        pks = list(candidates.values_list('pk', flat=True)[:limit])
+        if not pks:
+            return []
+        claimable.filter(pk__in=pks).update(claimed_by=token, claimed_at=now)
+    return list(RankingJob.objects.filter(claimed_by=token))
+
+def complete_ranking_jobs(jobs):
+    """
+    Removes finished jobs. A job requested again while it ran stays queued
+    (and unclaimed), since the run may have missed that change.
+    """
+    # Only while the claim is still ours, not another worker's after a timeout
+    claimed = RankingJob.objects.filter(pk__in=[job.pk for job in jobs], claimed_by=jobs[0].claimed_by)
+    claimed.filter(reduce(operator.or_, (Q(pk=job.pk, requested_at=job.requested_at) for job in jobs))).delete()
+    claimed.update(claimed_by='', claimed_at=None)
+
+def release_ranking_jobs(jobs, error):
+    """
+    Hands failed jobs back to the queue to be retried.
+    """
+    RankingJob.objects.filter(pk__in=[job.pk for job in jobs], claimed_by=jobs[0].claimed_by).update(
+        claimed_by='', claimed_at=None, attempts=F('attempts') + 1, last_error=str(error),
+    )
+
+def ranking_pending_since(semester_id):
+    """
+    When the newest of a semester's queued recalculations was requested, or
+    None when the worker has caught up (or the queue is off). Queueing leaves
+    the ranking version alone, so the dashboard and the API put this in
+    their ETags next to it; the worker's run bumps the version in the
+    transaction that removes the jobs.
+    """
+    if not settings.CTR_RANKING_QUEUE:
+        return None
+    return RankingJob.objects.filter(semester_id=semester_id).aggregate(latest=Max('requested_at'))['latest']
+
+async def aranking_pending_since(semester_id):
+    if not settings.CTR_RANKING_QUEUE:
+        return None
+    return (await RankingJob.objects.filter(semester_id=semester_id).aaggregate(latest=Max('requested_at')))['latest']
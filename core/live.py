@@ -0,0 +1,141 @@
+import asyncio
+import json
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from .models import RankingSnapshot
+
+# Snapshots a reconnecting client may be behind before it is told to reload
+CATCH_UP_LIMIT = 100
+# Events a slow client may have waiting before it is told to reload
+QUEUE_SIZE = 100
+# An idle stream sends a comment this often so proxies don't close it
+KEEPALIVE_SECONDS = 15
+# How often browsers poll instead when the server can't hold streams open (WSGI)
+POLL_RETRY_MS = 5000
+
+def format_event(pk, is_checkpoint, rows):
+    """
+    One RankingSnapshot as a server-sent event. `rows` holds the changed
+    clubs' [rank, tier, cps, event_count] (null when a club lost its
+    ranking); for a checkpoint it is the whole table.
+    """
+    data = json.dumps({'checkpoint': is_checkpoint, 'rows': rows}, separators=(',', ':'))
+    return f"id: {pk}\nevent: rankings\ndata: {data}\n\n"
+
+RELOAD_EVENT = "event: reload\ndata: {}\n\n"
+
+def snapshot_events(semester_id, after):
+    """
+    The (snapshot id, event) pairs a client that has seen snapshot `after`
+    missed, or a single reload event when it is too far behind for
+    replaying to be worth it.
+    """
+    snapshots = list(
+        RankingSnapshot.objects.filter(semester_id=semester_id, pk__gt=after).order_by('pk')
+        .values_list('pk', 'is_checkpoint', 'rows')[:CATCH_UP_LIMIT + 1]
+    )
+    if len(snapshots) > CATCH_UP_LIMIT:
+        return [(snapshots[-1][0], RELOAD_EVENT)]
+    return [(snapshot[0], format_event(*snapshot)) for snapshot in snapshots]
+
+def latest_snapshot_id(semester_id):
+    """
+    Where a live dashboard's stream starts: the semester's newest snapshot.
+    """
+    return RankingSnapshot.objects.filter(semester_id=semester_id).order_by('-pk').values_list('pk', flat=True).first() or 0
+
+class RankingBroadcaster:
+    """
+    Fans new RankingSnapshots out to the open ranking streams of this
+    process. While anyone listens, a single task polls the snapshot table
+    every CTR_LIVE_POLL_INTERVAL seconds, one indexed query for all
+    semesters, and queues each new snapshot, formatted once, for every
+    stream of its semester. Snapshots are written by whichever worker
+    re-ranked, so the table doubles as the channel between processes.
+    """
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        # The last snapshot seen per semester. A semester's snapshots are
+        # written under its lock, so they commit in id order; across
+        # semesters a lower id may commit later, hence no single cursor.
+        self.cursors = {}
+        self.task = None
+
+    async def subscribe(self, semester_id):
+        """
+        Returns a queue that receives (snapshot id, event) for every
+        snapshot of the semester written from now on.
+        """
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.subscribers.clear()
+            self.cursors.clear()
+            self.task = loop.create_task(self._run())
+        if semester_id not in self.cursors:
+            latest = await RankingSnapshot.objects.filter(semester_id=semester_id).order_by('-pk').values_list('pk', flat=True).afirst()
+            self.cursors.setdefault(semester_id, latest or 0)
+        queue = asyncio.Queue(QUEUE_SIZE)
+        self.subscribers[semester_id].add(queue)
+        return queue
+
+    def unsubscribe(self, semester_id, queue):
+        self.subscribers[semester_id].discard(queue)
+        if not self.subscribers[semester_id]:
+            del self.subscribers[semester_id]
+            self.cursors.pop(semester_id, None)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.CTR_LIVE_POLL_INTERVAL)
+            if not self.subscribers:
+                break
+            await self.poll()
+
+    async def poll(self):
+        cursors = dict(self.cursors)
+        if not cursors:
+            return
+        snapshots = RankingSnapshot.objects.filter(
+            semester_id__in=cursors, pk__gt=min(cursors.values()),
+        ).order_by('pk').values_list('pk', 'semester_id', 'is_checkpoint', 'rows')
+        async for pk, semester_id, is_checkpoint, rows in snapshots:
+            if pk <= self.cursors.get(semester_id, pk):
+                continue
+            self.cursors[semester_id] = pk
+            event = (pk, format_event(pk, is_checkpoint, rows))
+            for queue in list(self.subscribers.get(semester_id, ())):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Too slow to keep up: drop its backlog and have it reload
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait((pk, RELOAD_EVENT))
+
+broadcaster = RankingBroadcaster()
+
+async def ranking_events(semester_id, after):
+    """
+    A semester's live ranking stream: what the client missed since snapshot
+    `after`, then every new snapshot as the broadcaster sees it.
+    """
+    queue = await broadcaster.subscribe(semester_id)
+    try:
+        yield f"retry: {POLL_RETRY_MS}\n\n"
+        # Subscribed first, so nothing written meanwhile falls in between;
+        # what the catch-up already sent may arrive again through the queue
+        sent = 0
+        for sent, event in await sync_to_async(snapshot_events)(semester_id, after):
+            yield event
+        while True:
+            try:
+                pk, event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if pk > sent:
+                sent = pk
+                yield event
+    finally:
+        broadcaster.unsubscribe(semester_id, queue)
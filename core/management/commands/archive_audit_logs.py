@@ -0,0 +1,65 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from core.models import AuditLog
+
+class Command(BaseCommand):
+    help = 'Moves audit log entries older than --days into a gzip-compressed JSON Lines file and deletes them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=180, help='Archive entries older than this many days (default: 180)')
+        parser.add_argument('--output-dir', default=str(settings.BASE_DIR / 'audit_archive'), help='Where to write archive files')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows read/deleted per query (default: 5000)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many entries would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old_entries = AuditLog.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{old_entries.count()} entries older than {cutoff:%Y-%m-%d} would be archived.")
+            return
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        path = output_dir / f"audit-before-{cutoff:%Y%m%d}-{timezone.now():%Y%m%d%H%M%S}.jsonl.gz"
+
+        # Write the whole archive first; rows are only deleted once it is safely on disk
+        archived, last_pk = 0, 0
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            while True:
+                rows = list(
+                    old_entries.filter(pk__gt=last_pk).order_by('pk').values(
+                        'id', 'timestamp', 'user_id', 'user__username', 'action',
+                        'content_type__app_label', 'content_type__model', 'object_id',
+                        'club_id', 'data', 'details',
+                    )[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                for row in rows:
+                    f.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                archived += len(rows)
+                last_pk = rows[-1]['id']
+        with open(path, 'rb') as f:
+            os.fsync(f.fileno())
+
+        if not archived:
+            path.unlink()
+            self.stdout.write("Nothing to archive.")
+            return
+
+        deleted = 0
+        to_delete = old_entries.filter(pk__lte=last_pk)
+        while pks := list(to_delete.order_by('pk').values_list('pk', flat=True)[:options['batch_size']]):
+            deleted += AuditLog.objects.filter(pk__in=pks).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} entries to {path} and deleted {deleted}."))
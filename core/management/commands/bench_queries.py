@@ -0,0 +1,93 @@
+import statistics
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from core.models import Event, Ranking, AuditLog
+from core.seeding import seed_dataset, throwaway_database
+from core.services import METRICS
+
+# The indexes added for the hot queries, by model
+HOT_QUERY_INDEXES = [
+    (Event, 'event_semester_club_idx'),
+    (Ranking, 'ranking_semester_cps_idx'),
+    (Ranking, 'ranking_semester_rank_idx'),
+    (AuditLog, 'auditlog_timestamp_idx'),
+    (AuditLog, 'auditlog_action_time_idx'),
+]
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a throwaway test database and prints query plans and latency for the '
+        'ranking/event/audit hot queries with and without their indexes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clubs', type=int, default=300)
+        parser.add_argument('--semesters', type=int, default=4)
+        parser.add_argument('--events-per-club', type=int, default=84, help='Per semester (default gives ~100k events)')
+        parser.add_argument('--audit-logs', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query (default: 20)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.run(options)
+
+    def run(self, options):
+        started = time.monotonic()
+        semesters, clubs = seed_dataset(
+            options['clubs'], options['semesters'], options['events_per_club'],
+            seed=options['seed'], audit_logs=options['audit_logs'],
+        )
+        self.stdout.write(
+            f"Seeded {Event.objects.count()} events, {Ranking.objects.count()} rankings and "
+            f"{AuditLog.objects.count()} audit rows in {time.monotonic() - started:.1f}s "
+            f"({connection.vendor})."
+        )
+
+        semester = semesters[-1]
+        club = clubs[len(clubs) // 2]
+        since = timezone.now() - timedelta(days=1)
+        queries = {
+            # Same aggregate as calculate_club_performance, kept lazy so it can be explained
+            'calculate_club_performance': lambda: Event.objects.filter(club=club, semester=semester)
+                .values('club_id').annotate(Count('id'), *[Sum(f'{metric}_score') for metric in METRICS]),
+            'update_semester_ranks': lambda: Ranking.objects.filter(semester=semester)
+                .order_by('-cps', 'club__name').values_list('id', 'tier', 'rank'),
+            'dashboard': lambda: Ranking.objects.filter(semester=semester)
+                .order_by(F('rank').asc(nulls_last=True), '-cps'),
+            'audit recent': lambda: AuditLog.objects.filter(timestamp__gte=since).order_by('-timestamp')[:100],
+            'audit by action': lambda: AuditLog.objects.filter(action=AuditLog.Action.EVENT_UPDATED).order_by('-timestamp')[:100],
+        }
+
+        with_indexes = self.measure(queries, options['repeat'])
+        self.drop_indexes()
+        without_indexes = self.measure(queries, options['repeat'])
+
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            for label, results in [('without indexes', without_indexes), ('with indexes', with_indexes)]:
+                median, plan = results[name]
+                self.stdout.write(f"  {label}: {median * 1000:.3f} ms")
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+    def measure(self, queries, repeat):
+        results = {}
+        for name, build in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(build())
+                timings.append(time.perf_counter() - start)
+            results[name] = (statistics.median(timings), build().explain())
+        return results
+
+    def drop_indexes(self):
+        with connection.schema_editor() as editor:
+            for model, name in HOT_QUERY_INDEXES:
+                index = next(i for i in model._meta.indexes if i.name == name)
+                editor.remove_index(model, index)
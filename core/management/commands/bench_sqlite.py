@@ -0,0 +1,123 @@
+import itertools
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from core.models import Event, Ranking
+from core.seeding import seed_dataset, throwaway_database
+
+PROFILES = {
+    'default': {},
+    'production': settings.SQLITE_PRODUCTION_OPTIONS,
+}
+# The OPTIONS the profiles set; anything else configured is kept
+SQLITE_KEYS = set().union(*PROFILES.values())
+
+class Command(BaseCommand):
+    help = (
+        'Compares concurrent read/write throughput of SQLite with its default settings and with '
+        'the production profile (WAL, tuned pragmas, BEGIN IMMEDIATE), each on a throwaway database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clubs', type=int, default=300)
+        parser.add_argument('--events-per-club', type=int, default=20)
+        parser.add_argument('--writers', type=int, default=2, help='Threads saving events')
+        parser.add_argument('--readers', type=int, default=8, help='Threads reading the ranking table')
+        parser.add_argument('--seconds', type=float, default=10.0, help='How long each profile runs')
+        parser.add_argument('--profile', action='append', choices=sorted(PROFILES), help='Profile to run (repeatable; default both)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("bench_sqlite compares SQLite settings; the default database is not SQLite.")
+        # Every connection, including the ones the threads open, reads this dict when it connects
+        settings_dict = connection.settings_dict
+        db_options = settings_dict.setdefault('OPTIONS', {})
+        saved, conn_max_age = dict(db_options), settings_dict['CONN_MAX_AGE']
+        # Background threads (the audit flush) must not keep a connection to a
+        # profile's database once it is dropped
+        settings_dict['CONN_MAX_AGE'] = 0
+        results = {}
+        try:
+            for name in options['profile'] or ['default', 'production']:
+                db_options.clear()
+                db_options.update({key: value for key, value in saved.items() if key not in SQLITE_KEYS})
+                db_options.update(PROFILES[name])
+                connections.close_all()
+                with throwaway_database():
+                    results[name] = self.run(options)
+                connections.close_all()
+        finally:
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
+            db_options.clear()
+            db_options.update(saved)
+        self.report(results, options['seconds'])
+
+    def run(self, options):
+        semesters, clubs = seed_dataset(options['clubs'], 1, options['events_per_club'], seed=options['seed'])
+        semester = semesters[0]
+        events = list(Event.objects.filter(semester=semester).order_by('pk')[:options['writers']])
+        journal_mode = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+        connections.close_all()
+
+        stop = threading.Event()
+        stats = {'reads': [], 'writes': [], 'read_errors': 0, 'write_errors': 0}
+        lock = threading.Lock()
+
+        def loop(kind, operation):
+            timings, errors = [], 0
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        operation()
+                    except OperationalError:
+                        errors += 1
+                        continue
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+                with lock:
+                    stats[kind].extend(timings)
+                    stats[f'{kind[:-1]}_errors'] += errors
+
+        scores = itertools.count()
+        def write(event):
+            # The full signal chain of an admin save: audit, CPS delta, re-rank
+            event.planning_score = next(scores) % 21
+            event.save()
+
+        def read():
+            # The dashboard's ranking table
+            list(Ranking.objects.filter(semester=semester).select_related('club').order_by('rank', '-cps'))
+
+        threads = [threading.Thread(target=loop, args=('writes', lambda e=event: write(e))) for event in events]
+        threads += [threading.Thread(target=loop, args=('reads', read)) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        stats['journal_mode'] = journal_mode
+        return stats
+
+    def report(self, results, seconds):
+        self.stdout.write(
+            f"{'profile':<12} {'journal':>8} {'reads/s':>9} {'read p95 ms':>12} "
+            f"{'writes/s':>9} {'write p95 ms':>13} {'errors':>7}"
+        )
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name:<12} {stats['journal_mode']:>8} {len(stats['reads']) / seconds:>9.0f} "
+                f"{percentile(stats['reads'], 0.95):>12.1f} {len(stats['writes']) / seconds:>9.1f} "
+                f"{percentile(stats['writes'], 0.95):>13.1f} {stats['read_errors'] + stats['write_errors']:>7}"
+            )
+
+def percentile(timings, p):
+    if not timings:
+        return 0.0
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * p))]
@@ -0,0 +1,166 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.models import Club, Semester, Event, AuditLog
+from core.services import create_audit_log, defer_ranking
+
+# Columns every row must provide. `club` is the club's short code and
+# `semester` the semester name; everything else maps onto an Event field.
+EVENT_FIELDS = [
+    'name', 'date', 'expected_turnout', 'actual_turnout',
+    'planning_score', 'execution_score', 'documentation_score', 'innovation_score', 'turnout_score',
+]
+COLUMNS = ['club', 'semester'] + EVENT_FIELDS
+
+def iter_csv(f):
+    yield from csv.DictReader(f)
+
+def iter_jsonl(f):
+    for line_number, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                # Reported like any other invalid row, and the rest still gets validated
+                yield ValidationError(f"Invalid JSON on line {line_number}: {e.msg} (column {e.colno})")
+
+def iter_json_array(f, read_size=64 * 1024):
+    """
+    Yields the objects of a top-level JSON array one at a time, reading the
+    file in blocks instead of loading it whole.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(read_size).lstrip()
+    if not buf.startswith('['):
+        raise CommandError("Expected a JSON array of event objects.")
+    buf = buf[1:]
+    while True:
+        buf = buf.lstrip(' \t\r\n,')
+        if buf.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buf) if buf else (None, 0)
+        except json.JSONDecodeError:
+            end = 0
+        if not end:
+            more = f.read(read_size)
+            if not more:
+                raise CommandError("Unexpected end of JSON input.")
+            buf += more
+            continue
+        yield obj
+        buf = buf[end:]
+
+READERS = {'csv': iter_csv, 'jsonl': iter_jsonl, 'json': iter_json_array}
+
+class Command(BaseCommand):
+    help = 'Bulk imports events from a CSV, JSON array or JSON Lines file and recalculates rankings once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to the file to import')
+        parser.add_argument('--format', choices=sorted(READERS), help='File format (default: from the file extension)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk insert (default: 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without writing anything')
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        fmt = options['format'] or path.suffix.lstrip('.').lower()
+        if fmt not in READERS:
+            raise CommandError(f"Cannot tell the format of '{path.name}'; pass --format.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        # Resolve clubs and semesters once instead of per row
+        self.club_ids = dict(Club.objects.values_list('short_code', 'id'))
+        self.semester_ids = dict(Semester.objects.values_list('name', 'id'))
+        self.fields = {name: Event._meta.get_field(name) for name in EVENT_FIELDS}
+
+        dry_run = options['dry_run']
+        errors = []
+        imported = 0
+        started = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = enumerate(READERS[fmt](f), start=1)
+            with transaction.atomic(), defer_ranking() as batch:
+                while chunk := list(islice(rows, options['chunk_size'])):
+                    events = []
+                    for row_number, row in chunk:
+                        try:
+                            events.append(self.build_event(row))
+                        except ValidationError as e:
+                            errors.append(f"Row {row_number}: {'; '.join(e.messages)}")
+
+                    # Keep validating after the first error so every problem gets reported
+                    if dry_run or errors:
+                        imported += len(events)
+                        continue
+
+                    Event.objects.bulk_create(events)
+                    for event in events:
+                        batch.add(event.club_id, event.semester_id)
+                    imported += len(events)
+
+                if errors and not dry_run:
+                    self.report_errors(errors)
+                    raise CommandError(f"Import aborted, {len(errors)} invalid row(s). Nothing was imported.")
+
+                if not dry_run and imported:
+                    create_audit_log(
+                        None, AuditLog.Action.EVENTS_IMPORTED, f"Imported {imported} events from {path.name}",
+                        {'file': path.name, 'count': imported},
+                    )
+
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        if dry_run:
+            self.report_errors(errors)
+            self.stdout.write(f"Dry run: {imported} valid row(s), {len(errors)} invalid, {rate:.0f} rows/sec.")
+            if errors:
+                raise CommandError(f"{len(errors)} invalid row(s).")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {imported} event(s) in {elapsed:.2f}s ({rate:.0f} rows/sec)."
+            ))
+
+    def build_event(self, row):
+        if isinstance(row, ValidationError):
+            raise row
+        if not isinstance(row, dict):
+            raise ValidationError("Expected an object with the event columns.")
+        missing = [column for column in COLUMNS if row.get(column) in (None, '')]
+        if missing:
+            raise ValidationError(f"Missing {', '.join(missing)}")
+
+        club_id = self.club_ids.get(str(row['club']).strip())
+        semester_id = self.semester_ids.get(str(row['semester']).strip())
+        if club_id is None:
+            raise ValidationError(f"Unknown club '{row['club']}'")
+        if semester_id is None:
+            raise ValidationError(f"Unknown semester '{row['semester']}'")
+
+        values = {}
+        messages = []
+        for name, field in self.fields.items():
+            try:
+                value = field.to_python(row[name])
+                # Applies the 0-20 score range from the model validators
+                field.run_validators(value)
+                values[name] = value
+            except ValidationError as e:
+                messages.extend(f"{name}: {message}" for message in e.messages)
+        if messages:
+            raise ValidationError(messages)
+
+        return Event(club_id=club_id, semester_id=semester_id, **values)
+
+    def report_errors(self, errors, limit=20):
+        for error in errors[:limit]:
+            self.stderr.write(error)
+        if len(errors) > limit:
+            self.stderr.write(f"... and {len(errors) - limit} more.")
@@ -0,0 +1,87 @@
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = (
+        'Fires concurrent GET requests at a running server (e.g. gunicorn with sync or uvicorn workers) '
+        'and reports throughput and latency percentiles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--path', action='append', default=[], help='Path to request, cycled (repeatable; default /)')
+        parser.add_argument('--user', help='Username to send requests as; a session is created for it in the database')
+        parser.add_argument('--concurrency', type=int, default=50, help='Simultaneous clients')
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds before a request counts as failed')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or ['/']
+        headers = {}
+        if options['user']:
+            headers['Cookie'] = f"{settings.SESSION_COOKIE_NAME}={self.create_session(options['user'])}"
+
+        urls = [options['url'].rstrip('/') + path for path in paths]
+        statuses = Counter()
+        latencies = []
+        lock = threading.Lock()
+
+        def fetch(i):
+            request = urllib.request.Request(urls[i % len(urls)], headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options['timeout']) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] += 1
+                latencies.append(elapsed)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(fetch, range(options['requests'])))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} concurrent, in {wall:.2f} s: "
+            f"{options['requests'] / wall:.0f} req/s"
+        )
+        self.stdout.write(
+            f"  latency ms: median {statistics.median(latencies) * 1000:.1f}, p95 {percentile(0.95):.1f}, "
+            f"p99 {percentile(0.99):.1f}, max {latencies[-1] * 1000:.1f}"
+        )
+        self.stdout.write(f"  statuses: {', '.join(f'{status} x{count}' for status, count in sorted(statuses.items(), key=str))}")
+
+    def create_session(self, username):
+        """
+        Logs the user in by writing a session straight to the session store,
+        so the test doesn't need their password.
+        """
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {username} does not exist.")
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session.session_key
@@ -0,0 +1,76 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.models import Club, Semester
+
+def init_worker():
+    # Spawned workers start with a fresh interpreter
+    django.setup()
+
+def recompute_worker(semester_id):
+    from core.audit import audit_buffer
+    from core.services import recompute_semester
+    started = time.perf_counter()
+    diff = recompute_semester(Semester.objects.get(pk=semester_id))
+    audit_buffer.flush()
+    return semester_id, diff, time.perf_counter() - started
+
+class Command(BaseCommand):
+    help = 'Recomputes every ranking of a semester (or all semesters) from its events and reports what changed'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--semester', type=int, help='Semester ID to recompute')
+        target.add_argument('--all', action='store_true', help='Recompute every semester')
+        parser.add_argument('--workers', type=int, default=1, help='Processes for --all (default: 1)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers must be positive.")
+        if options['all']:
+            semester_ids = list(Semester.objects.order_by('pk').values_list('pk', flat=True))
+        elif Semester.objects.filter(pk=options['semester']).exists():
+            semester_ids = [options['semester']]
+        else:
+            raise CommandError(f"Semester {options['semester']} does not exist.")
+
+        workers = min(options['workers'], len(semester_ids)) or 1
+        if workers > 1 and connection.vendor == 'sqlite':
+            # SQLite allows one writer at a time, so extra processes would only wait on the lock
+            self.stderr.write("SQLite serializes writes; recomputing in a single process.")
+            workers = 1
+
+        started = time.perf_counter()
+        if workers == 1:
+            results = map(recompute_worker, semester_ids)
+            self.report(results)
+        else:
+            # Connections can't be shared with child processes
+            connection.close()
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+            ) as pool:
+                self.report(pool.map(recompute_worker, semester_ids))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {len(semester_ids)} semester(s) in {time.perf_counter() - started:.2f}s "
+            f"with {workers} worker(s)."
+        ))
+
+    def report(self, results):
+        semesters = Semester.objects.in_bulk()
+        for semester_id, diff, seconds in results:
+            self.stdout.write(f"{semesters[semester_id]}: {len(diff)} change(s) in {seconds * 1000:.0f} ms")
+            clubs = Club.objects.in_bulk({club_id for club_id, _, _ in diff})
+            for club_id, before, after in diff:
+                name = clubs[club_id].short_code if club_id in clubs else f"club {club_id}"
+                self.stdout.write(f"  {name}: {describe(before)} -> {describe(after)}")
+
+def describe(state):
+    if state is None:
+        return "no ranking"
+    tier, rank = state
+    return f"tier {tier}, rank {rank if rank is not None else '-'}"
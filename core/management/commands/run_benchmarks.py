@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+import platform
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from core.jobs import claim_ranking_jobs
+from core.models import Event, Ranking
+from core.seeding import seed_dataset, throwaway_database
+from core.snapshots import rankings_as_of
+from core.services import calculate_club_performance, recompute_semester, run_ranking_jobs, update_semester_ranks
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the scoring pipeline (event saves, bulk import, semester recompute, '
+        'dashboard and export) on a seeded throwaway database and writes JSON results'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clubs', type=int, default=300)
+        parser.add_argument('--semesters', type=int, default=2)
+        parser.add_argument('--events-per-club', type=int, default=20)
+        parser.add_argument('--import-rows', type=int, default=5000, help='Rows in the bulk import benchmark')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per latency benchmark')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent writers in the concurrent save benchmark')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            results = self.run(options)
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2) + '\n')
+            self.stdout.write(f"Results written to {options['output']}.")
+        previous = json.loads(Path(options['compare']).read_text()) if options['compare'] else None
+        self.report(results, previous)
+
+    def run(self, options):
+        repeat = options['repeat']
+        started = time.monotonic()
+        semesters, clubs = seed_dataset(
+            options['clubs'], options['semesters'], options['events_per_club'], seed=options['seed']
+        )
+        semester = semesters[-1]
+        seed_seconds = time.monotonic() - started
+        benchmarks = {}
+
+        # Single event save: the full signal chain (audit, CPS delta, re-rank)
+        event = Event.objects.filter(semester=semester).order_by('pk').first()
+        scores = iter(range(10 ** 6))
+        def save_event():
+            event.planning_score = next(scores) % 21
+            event.save()
+        benchmarks['event_save'] = measure(save_event, repeat)
+
+        # The same save with CTR_RANKING_QUEUE: the request only queues a job, and
+        # the worker's run is timed separately
+        with override_settings(CTR_RANKING_QUEUE=True):
+            benchmarks['event_save_queued'] = measure(save_event, repeat)
+        benchmarks['ranking_worker_run'] = measure(lambda: run_ranking_jobs(claim_ranking_jobs()), 1)
+
+        # The same saves from several threads at once, each on its own connection
+        # like separate gunicorn workers: ranking writers queue on the semester lock
+        events = list(Event.objects.filter(semester=semester).order_by('pk')[:options['threads']])
+        def save_concurrently():
+            threads = [threading.Thread(target=save_events, args=(event, repeat)) for event in events]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        result = measure(save_concurrently, 1)
+        result['saves_per_sec'] = len(events) * repeat / (result['median_ms'] / 1000)
+        benchmarks['concurrent_event_saves'] = result
+
+        # Rebuilding the table as it stood after those saves, from the latest
+        # checkpoint plus at most CHECKPOINT_CHANGES delta entries
+        as_of = timezone.now()
+        benchmarks['rankings_as_of'] = measure(lambda: rankings_as_of(semester, as_of), repeat)
+
+        # Bulk import through the import_events command
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'events.csv'
+            write_import_file(path, clubs, semester, options['import_rows'])
+            result = measure(lambda: call_command('import_events', str(path), stdout=io.StringIO()), 1)
+        result['rows_per_sec'] = options['import_rows'] / (result['median_ms'] / 1000)
+        benchmarks['bulk_import'] = result
+
+        # Recalculating every club of a semester from scratch: club by club, and
+        # with the single GROUP BY aggregate used by recompute_rankings
+        def recompute_per_club():
+            for club in clubs:
+                calculate_club_performance(club, semester)
+            update_semester_ranks(semester, [club.pk for club in clubs])
+        benchmarks['semester_recompute'] = measure(recompute_per_club, max(1, repeat // 5))
+        benchmarks['semester_recompute_bulk'] = measure(lambda: recompute_semester(semester), max(1, repeat // 5))
+
+        # Dashboard and export over HTTP
+        user = get_user_model().objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+        client = Client()
+        client.force_login(user)
+        dashboard_url = f"{reverse('dashboard')}?semester={semester.pk}"
+        def render_dashboard_cold():
+            cache.clear()
+            get(client, dashboard_url)
+        benchmarks['dashboard_cold'] = measure(render_dashboard_cold, repeat)
+        benchmarks['dashboard_cached'] = measure(lambda: get(client, dashboard_url), repeat)
+        benchmarks['export_rankings'] = measure(
+            lambda: get(client, f"{reverse('export_rankings')}?semester={semester.pk}"), repeat
+        )
+        benchmarks['export_events'] = measure(lambda: get(client, reverse('export_events')), max(1, repeat // 5))
+
+        return {
+            'recorded_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'dataset': {
+                'clubs': options['clubs'],
+                'semesters': options['semesters'],
+                'events_per_club': options['events_per_club'],
+                'events': Event.objects.count(),
+                'rankings': Ranking.objects.count(),
+                'seed': options['seed'],
+                'seed_seconds': round(seed_seconds, 2),
+            },
+            'benchmarks': benchmarks,
+        }
+
+    def report(self, results, previous=None):
+        self.stdout.write(f"{'benchmark':<24} {'median ms':>10} {'p95 ms':>10} {'queries':>8}")
+        for name, result in results['benchmarks'].items():
+            line = f"{name:<24} {result['median_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['queries']:>8}"
+            before = previous and previous['benchmarks'].get(name)
+            if before:
+                change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+                line += f"  ({change:+.0f}% vs {before['median_ms']:.2f} ms, {before['queries']} queries)"
+            self.stdout.write(line)
+        rate = results['benchmarks']['bulk_import']['rows_per_sec']
+        self.stdout.write(f"bulk import: {rate:.0f} rows/sec")
+        rate = results['benchmarks']['concurrent_event_saves']['saves_per_sec']
+        self.stdout.write(f"concurrent event saves: {rate:.0f} saves/sec")
+
+def measure(fn, repeat):
+    """
+    Runs `fn` `repeat` times and returns latency percentiles plus the number
+    of queries of the last run.
+    """
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'runs': repeat,
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'min_ms': round(timings[0], 3),
+        'queries': len(ctx),
+    }
+
+def save_events(event, count):
+    try:
+        for i in range(count):
+            event.planning_score = i % 21
+            event.save()
+    finally:
+        connections.close_all()
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (url, response.status_code)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+
+def write_import_file(path, clubs, semester, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'club', 'semester', 'name', 'date', 'expected_turnout', 'actual_turnout',
+            'planning_score', 'execution_score', 'documentation_score', 'innovation_score', 'turnout_score',
+        ])
+        for i in range(rows):
+            score = i % 21
+            writer.writerow([
+                clubs[i % len(clubs)].short_code, semester.name, f"Imported {i}", '2024-01-15', 100, 80,
+                score, score, score, score, score,
+            ])
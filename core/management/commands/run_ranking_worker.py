@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from core.audit import audit_buffer
+from core.jobs import claim_ranking_jobs
+from core.services import run_ranking_jobs
+from core.sqlite import optimize_if_due
+
+class Command(BaseCommand):
+    help = (
+        'Runs the ranking recalculations queued by event saves when CTR_RANKING_QUEUE is on. '
+        'Start as many workers as needed; each claims its own jobs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs claimed at a time')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        done = failed = 0
+        try:
+            while True:
+                jobs = claim_ranking_jobs(options['batch_size'])
+                if not jobs:
+                    if options['once']:
+                        break
+                    # Waiting also lets a burst of saves coalesce into fewer jobs
+                    time.sleep(options['interval'])
+                    optimize_if_due(connection)
+                    # As between requests: drop a connection that died or outlived CONN_MAX_AGE
+                    close_old_connections()
+                    continue
+                started = time.perf_counter()
+                errors = run_ranking_jobs(jobs)
+                audit_buffer.flush()
+                done += len(jobs) - errors
+                failed += errors
+                self.stdout.write(
+                    f"Ran {len(jobs) - errors} job(s) in {(time.perf_counter() - started) * 1000:.0f} ms"
+                    + (f", {errors} failed and requeued" if errors else "")
+                )
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Done: {done} job(s) run, {failed} failed.")
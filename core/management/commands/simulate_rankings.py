@@ -0,0 +1,63 @@
+import json
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Semester
+from core.simulation import simulate
+
+class Command(BaseCommand):
+    help = (
+        'Evaluates what-if scoring scenarios (weights, tier thresholds, minimum events) for a semester '
+        'without changing any rankings'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, required=True, help='Semester ID to simulate')
+        parser.add_argument(
+            '--scenario', action='append', default=[],
+            help='Scenario as JSON, e.g. \'{"weights": {"turnout": 2}, "tier_a_min": 85}\' (repeatable)',
+        )
+        parser.add_argument('--file', help='JSON file with a list of scenarios')
+        parser.add_argument('--top', type=int, default=5, help='Biggest rank moves to list per scenario')
+        parser.add_argument('--json', action='store_true', help='Print the full results as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester'])
+        except Semester.DoesNotExist:
+            raise CommandError(f"Semester {options['semester']} does not exist.")
+
+        try:
+            specs = [json.loads(scenario) for scenario in options['scenario']]
+            if options['file']:
+                specs += json.loads(Path(options['file']).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read the scenarios: {e}")
+
+        started = time.perf_counter()
+        try:
+            result = simulate(semester, specs, top=options['top'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        for scenario_result in result['results']:
+            counts = ', '.join(f"{tier}: {count}" for tier, count in scenario_result['tier_counts'].items())
+            movements = ', '.join(f"{move} x{count}" for move, count in scenario_result['tier_movements'].items())
+            self.stdout.write(f"{scenario_result['scenario']['name']}: {counts}")
+            self.stdout.write(
+                f"  {scenario_result['tier_changes']} tier change(s) ({movements or 'none'}), "
+                f"{scenario_result['rank_changes']} rank change(s)"
+            )
+            for club in scenario_result['biggest_moves']:
+                self.stdout.write(
+                    f"  {club['short_code']}: rank {club['previous_rank'] or '-'} -> {club['rank'] or '-'}, "
+                    f"tier {club['previous_tier']} -> {club['tier']} (CPS {club['cps']})"
+                )
+        self.stdout.write(
+            f"Simulated {len(result['results'])} scenario(s) over {result['clubs']} club(s) in {elapsed * 1000:.0f} ms."
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Semester
+from core.services import find_ranking_drift, rebuild_rankings
+
+class Command(BaseCommand):
+    help = 'Checks the running CPS sums on Ranking against the events and optionally rebuilds drifted rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', type=int, help='Only check this semester ID')
+        parser.add_argument('--rebuild', action='store_true', help='Recalculate drifted rankings from scratch')
+
+    def handle(self, *args, **options):
+        semester = None
+        if options['semester']:
+            try:
+                semester = Semester.objects.get(pk=options['semester'])
+            except Semester.DoesNotExist:
+                raise CommandError(f"Semester {options['semester']} does not exist.")
+
+        drift = find_ranking_drift(semester)
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("No drift found."))
+            return
+
+        for club_id, semester_id, stored, actual in drift:
+            self.stdout.write(f"Club {club_id} / Semester {semester_id}: stored={stored} actual={actual}")
+        self.stdout.write(self.style.WARNING(f"{len(drift)} ranking(s) drifted."))
+
+        if options['rebuild']:
+            rebuild_rankings((club_id, semester_id) for club_id, semester_id, _, _ in drift)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(drift)} ranking(s)."))
@@ -0,0 +1,180 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Seconds; roughly Prometheus' default buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+class Histogram:
+    """
+    Fixed-bucket histogram; memory doesn't grow with the number of samples.
+    """
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricFamily:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        histogram = self.series.get(labels)
+        if histogram is None:
+            histogram = self.series[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+class MetricsRegistry:
+    """
+    Per-process request and signal handler statistics: histograms per label
+    set, plus a bounded ring buffer of recent request timings for quantiles.
+    Rendered in the Prometheus text exposition format.
+    """
+    def __init__(self, recent_size=1000):
+        self.lock = threading.Lock()
+        self.request_seconds = MetricFamily(
+            'ctr_request_duration_seconds', 'Request wall time by view.', LATENCY_BUCKETS)
+        self.request_queries = MetricFamily(
+            'ctr_request_db_queries', 'Database queries per request by view.', QUERY_COUNT_BUCKETS)
+        self.request_db_seconds = MetricFamily(
+            'ctr_request_db_duration_seconds', 'Time spent in database queries per request by view.', LATENCY_BUCKETS)
+        self.handler_seconds = MetricFamily(
+            'ctr_signal_handler_duration_seconds', 'Wall time of the signal handlers in core.services.', LATENCY_BUCKETS)
+        self.recent = deque(maxlen=recent_size)
+
+    def record_request(self, view, method, seconds, queries, db_seconds):
+        with self.lock:
+            self.request_seconds.observe((('view', view), ('method', method)), seconds)
+            self.request_queries.observe((('view', view),), queries)
+            self.request_db_seconds.observe((('view', view),), db_seconds)
+            self.recent.append((view, seconds))
+
+    def record_handler(self, handler, seconds):
+        with self.lock:
+            self.handler_seconds.observe((('handler', handler),), seconds)
+
+    def reset(self):
+        with self.lock:
+            for family in self.families():
+                family.series.clear()
+            self.recent.clear()
+
+    def families(self):
+        return [self.request_seconds, self.request_queries, self.request_db_seconds, self.handler_seconds]
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for family in self.families():
+                lines.append(f"# HELP {family.name} {family.help_text}")
+                lines.append(f"# TYPE {family.name} histogram")
+                for labels, histogram in sorted(family.series.items()):
+                    cumulative = 0
+                    for bound, count in zip(family.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{family.name}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{family.name}_sum{format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{family.name}_count{format_labels(labels)} {histogram.count}")
+
+            recent = defaultdict(list)
+            for view, seconds in self.recent:
+                recent[view].append(seconds)
+
+        name = 'ctr_recent_request_duration_seconds'
+        lines.append(f"# HELP {name} Request wall time over the last {self.recent.maxlen} requests by view.")
+        lines.append(f"# TYPE {name} summary")
+        for view, samples in sorted(recent.items()):
+            samples.sort()
+            for q in SUMMARY_QUANTILES:
+                value = samples[min(len(samples) - 1, int(q * len(samples)))]
+                lines.append(f"{name}{format_labels((('view', view), ('quantile', q)))} {value}")
+            lines.append(f"{name}_sum{format_labels((('view', view),))} {sum(samples)}")
+            lines.append(f"{name}_count{format_labels((('view', view),))} {len(samples)}")
+        return '\n'.join(lines) + '\n'
+
+def format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+registry = MetricsRegistry(recent_size=settings.CTR_METRICS_RECENT_REQUESTS)
+
+class QueryTimer:
+    """
+    Execute wrapper counting queries and their total time.
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+# The QueryTimer of the request being handled. Connections are per thread,
+# and an async view's queries run on the connection of a sync_to_async
+# thread, so the timer travels with the request's context (which asgiref
+# copies into those threads) and every connection reports to it.
+_request_timer = ContextVar('ctr_request_timer', default=None)
+
+def record_query(execute, sql, params, many, context):
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # The wrappers outlive a reconnect of the same connection object
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+@contextmanager
+def timing_queries():
+    """
+    Counts the queries run in this context, on any thread's connection,
+    into the QueryTimer it yields.
+    """
+    timer = QueryTimer()
+    token = _request_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _request_timer.reset(token)
+
+def timed_handler(func):
+    """
+    Records the wall time of a signal handler under its function name.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not settings.CTR_METRICS_ENABLED:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.record_handler(func.__name__, time.perf_counter() - start)
+    return wrapper
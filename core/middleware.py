@@ -1,15 +1,121 @@
-import threading
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
 
-_thread_locals = threading.local()
+# A context variable rather than a thread local: under ASGI many requests
+# share a thread, and asgiref copies the context into sync_to_async threads.
+# It holds the request rather than the lazy request.user, which asgiref
+# would evaluate (a query) while copying the context.
+_current_request = ContextVar('ctr_current_request', default=None)
+
+KNOWN_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
 
 def get_current_user():
-    return getattr(_thread_locals, 'user', None)
+    request = _current_request.get()
+    return request.user if request is not None else None
 
 class CurrentUserMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            # Don't leak the request into code that runs later in this context
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+class MetricsMiddleware:
+    """
+    Records wall time, query count and query time per view into the
+    in-process metrics registry. Goes first in MIDDLEWARE so the timing
+    covers the rest of the stack; for streaming responses it stops when the
+    response is returned, before the body is sent.
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        _thread_locals.user = request.user
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.CTR_METRICS_ENABLED:
+            return self.get_response(request)
+
+        from .metrics import timing_queries
+        start = time.perf_counter()
+        with timing_queries() as timer:
+            response = self.get_response(request)
+        self.record(request, time.perf_counter() - start, timer)
         return response
+
+    async def __acall__(self, request):
+        if not settings.CTR_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        from .metrics import timing_queries
+        start = time.perf_counter()
+        # The view's queries run on the connections of sync_to_async threads,
+        # which report to the timer through the request's context
+        with timing_queries() as timer:
+            response = await self.get_response(request)
+        self.record(request, time.perf_counter() - start, timer)
+        return response
+
+    def record(self, request, elapsed, timer):
+        from .metrics import registry
+        # Label by URL name rather than path so the number of series stays bounded
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        method = request.method if request.method in KNOWN_METHODS else 'other'
+        registry.record_request(view, method, elapsed, timer.count, timer.seconds)
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, made async-capable. WhiteNoise itself is sync-only, so under
+    ASGI Django would run every request through a worker thread around it;
+    this passes non-static requests straight on and only serves the static
+    files themselves in a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
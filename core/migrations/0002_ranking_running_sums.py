@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:40
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+METRICS = ["planning", "execution", "documentation", "innovation", "turnout"]
+
+
+def backfill_running_sums(apps, schema_editor):
+    Event = apps.get_model("core", "Event")
+    Ranking = apps.get_model("core", "Ranking")
+
+    totals = Event.objects.values("club_id", "semester_id").annotate(
+        event_count=Count("id"),
+        **{f"sum_{metric}": Sum(f"{metric}_score") for metric in METRICS},
+    )
+    by_pair = {(t["club_id"], t["semester_id"]): t for t in totals}
+
+    rankings = list(Ranking.objects.all())
+    for ranking in rankings:
+        t = by_pair.get((ranking.club_id, ranking.semester_id))
+        for metric in METRICS:
+            setattr(ranking, f"sum_{metric}", t[f"sum_{metric}"] if t else 0)
+    Ranking.objects.bulk_update(
+        rankings, [f"sum_{metric}" for metric in METRICS], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ranking",
+            name="sum_planning",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ranking",
+            name="sum_execution",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ranking",
+            name="sum_documentation",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ranking",
+            name="sum_innovation",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ranking",
+            name="sum_turnout",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_running_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_ranking_running_sums"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["timestamp"], name="auditlog_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["action", "timestamp"], name="auditlog_action_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["semester", "club"], name="event_semester_club_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ranking",
+            index=models.Index(fields=["semester", "-cps"], name="ranking_semester_cps_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ranking",
+            index=models.Index(fields=["semester", "rank"], name="ranking_semester_rank_idx"),
+        ),
+    ]
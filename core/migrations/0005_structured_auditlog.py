@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Free-text actions written before AuditLog.Action existed
+LEGACY_ACTIONS = {
+    "Event Added": "event_added",
+    "Event Updated": "event_updated",
+    "Event Deleted": "event_deleted",
+    "Events Imported": "events_imported",
+    "Semester Calculation": "semester_calculation",
+    "Club Added": "club_added",
+    "Club Updated": "club_updated",
+}
+
+
+def convert_actions(apps, schema_editor):
+    AuditLog = apps.get_model("core", "AuditLog")
+    for label, code in LEGACY_ACTIONS.items():
+        AuditLog.objects.filter(action=label).update(action=code)
+    AuditLog.objects.exclude(action__in=LEGACY_ACTIONS.values()).update(action="other")
+
+
+def restore_actions(apps, schema_editor):
+    AuditLog = apps.get_model("core", "AuditLog")
+    for label, code in LEGACY_ACTIONS.items():
+        AuditLog.objects.filter(action=code).update(action=label)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0004_auditlog_timestamp_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditlog",
+            name="club",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="audit_logs",
+                to="core.club",
+            ),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="content_type",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="contenttypes.contenttype",
+            ),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="data",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="object_id",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(convert_actions, restore_actions),
+        migrations.AlterField(
+            model_name="auditlog",
+            name="action",
+            field=models.CharField(
+                choices=[
+                    ("event_added", "Event Added"),
+                    ("event_updated", "Event Updated"),
+                    ("event_deleted", "Event Deleted"),
+                    ("events_imported", "Events Imported"),
+                    ("semester_calculation", "Semester Calculation"),
+                    ("club_added", "Club Added"),
+                    ("club_updated", "Club Updated"),
+                    ("other", "Other"),
+                ],
+                max_length=32,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["content_type", "object_id"], name="auditlog_target_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:54
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_structured_auditlog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoringPolicy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                (
+                    "planning_weight",
+                    models.FloatField(
+                        default=1.0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "execution_weight",
+                    models.FloatField(
+                        default=1.0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "documentation_weight",
+                    models.FloatField(
+                        default=1.0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "innovation_weight",
+                    models.FloatField(
+                        default=1.0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "turnout_weight",
+                    models.FloatField(
+                        default=1.0,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                ("tier_a_min", models.FloatField(default=90.0)),
+                ("tier_b_min", models.FloatField(default=75.0)),
+                ("tier_c_min", models.FloatField(default=60.0)),
+                (
+                    "min_events",
+                    models.PositiveIntegerField(
+                        default=2,
+                        validators=[django.core.validators.MinValueValidator(1)],
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=1, editable=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "scoring policies",
+            },
+        ),
+        migrations.AlterField(
+            model_name="auditlog",
+            name="action",
+            field=models.CharField(
+                choices=[
+                    ("event_added", "Event Added"),
+                    ("event_updated", "Event Updated"),
+                    ("event_deleted", "Event Deleted"),
+                    ("events_imported", "Events Imported"),
+                    ("semester_calculation", "Semester Calculation"),
+                    ("club_added", "Club Added"),
+                    ("club_updated", "Club Updated"),
+                    ("policy_updated", "Scoring Policy Updated"),
+                    ("other", "Other"),
+                ],
+                max_length=32,
+            ),
+        ),
+        migrations.AddField(
+            model_name="semester",
+            name="scoring_policy",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Leave empty to use the default weights and tier thresholds.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="semesters",
+                to="core.scoringpolicy",
+            ),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+WINDOW = 3
+TIER_LEVELS = {"D": 0, "C": 1, "B": 2, "A": 3}
+
+
+def backfill_history(apps, schema_editor):
+    Ranking = apps.get_model("core", "Ranking")
+    ClubHistory = apps.get_model("core", "ClubHistory")
+    rows = []
+    previous = {}
+    windows = {}
+    for ranking in Ranking.objects.order_by("club_id", "semester_id").iterator():
+        prev = previous.get(ranking.club_id)
+        window = (windows.get(ranking.club_id, []) + [ranking.cps])[-WINDOW:]
+        windows[ranking.club_id] = window
+        row = ClubHistory(
+            club_id=ranking.club_id,
+            semester_id=ranking.semester_id,
+            cps=ranking.cps,
+            tier=ranking.tier,
+            rank=ranking.rank,
+            event_count=ranking.event_count,
+            cps_moving_avg=sum(window) / len(window),
+            tier_streak=1,
+        )
+        if prev is not None:
+            row.cps_change = ranking.cps - prev.cps
+            if ranking.tier in TIER_LEVELS and prev.tier in TIER_LEVELS:
+                change = TIER_LEVELS[ranking.tier] - TIER_LEVELS[prev.tier]
+                row.tier_change = (change > 0) - (change < 0)
+            if ranking.tier == prev.tier:
+                row.tier_streak = prev.tier_streak + 1
+        previous[ranking.club_id] = row
+        rows.append(row)
+    ClubHistory.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_scoring_policy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClubHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cps", models.FloatField()),
+                (
+                    "tier",
+                    models.CharField(
+                        choices=[
+                            ("A", "Tier A"),
+                            ("B", "Tier B"),
+                            ("C", "Tier C"),
+                            ("D", "Tier D"),
+                            ("P", "Tier Pending"),
+                        ],
+                        max_length=1,
+                    ),
+                ),
+                ("rank", models.PositiveIntegerField(blank=True, null=True)),
+                ("event_count", models.PositiveIntegerField()),
+                ("cps_change", models.FloatField(blank=True, null=True)),
+                ("tier_change", models.SmallIntegerField(blank=True, null=True)),
+                ("cps_moving_avg", models.FloatField()),
+                ("tier_streak", models.PositiveIntegerField(default=1)),
+                (
+                    "club",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="history",
+                        to="core.club",
+                    ),
+                ),
+                (
+                    "semester",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="club_history",
+                        to="core.semester",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "club history",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("club", "semester"),
+                        name="clubhistory_club_semester_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def initial_checkpoints(apps, schema_editor):
+    Ranking = apps.get_model("core", "Ranking")
+    RankingSnapshot = apps.get_model("core", "RankingSnapshot")
+    tables = {}
+    for semester_id, club_id, rank, tier, cps, event_count in Ranking.objects.values_list(
+        "semester_id", "club_id", "rank", "tier", "cps", "event_count"
+    ).iterator():
+        tables.setdefault(semester_id, {})[str(club_id)] = [rank, tier, cps, event_count]
+    RankingSnapshot.objects.bulk_create(
+        RankingSnapshot(semester_id=semester_id, is_checkpoint=True, rows=rows)
+        for semester_id, rows in tables.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_ranking_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RankingSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "recorded_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("is_checkpoint", models.BooleanField(default=False)),
+                ("rows", models.JSONField()),
+                ("changes_since_checkpoint", models.PositiveIntegerField(default=0)),
+                (
+                    "semester",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ranking_snapshots",
+                        to="core.semester",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["semester", "recorded_at"],
+                        name="snapshot_semester_time_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(initial_checkpoints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:02
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_ranking_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="semester",
+            name="ranking_version",
+            field=models.BigIntegerField(
+                default=core.models.ranking_version_now, editable=False
+            ),
+        ),
+    ]
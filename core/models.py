@@ -1,15 +1,131 @@
-from django.db import models
+import time
+from django.db import models, transaction
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from django.utils import timezone
 
-class Semester(models.Model):
+class TrackedFieldsMixin:
+    """
+    Snapshots field values when an instance is loaded from the database (and
+    after each save), so audit handlers can diff a save against what was
+    loaded without querying the old row again.
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._current_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Reading a deferred field reloads just that one; edits to the others
+        # are still unsaved and must keep diffing against what was loaded
+        self._update_loaded_values(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._update_loaded_values(kwargs.get('update_fields'))
+
+    def _update_loaded_values(self, fields):
+        current = self._current_values()
+        if fields is None:
+            self._loaded_values = current
+            return
+        fields = set(fields)
+        attnames = {f.attname for f in self._meta.concrete_fields if f.name in fields or f.attname in fields}
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{attname: value for attname, value in current.items() if attname in attnames},
+        }
+
+    def _current_values(self):
+        # Deferred fields aren't in __dict__ and aren't tracked
+        return {
+            f.attname: self.__dict__[f.attname]
+            for f in self._meta.concrete_fields if f.attname in self.__dict__
+        }
+
+    def get_loaded_values(self, fields):
+        """
+        The values `fields` (attnames) had when loaded or last saved, or None
+        if the instance wasn't loaded from the database or any of them was
+        deferred.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or not all(field in loaded for field in fields):
+            return None
+        return {field: loaded[field] for field in fields}
+
+class ScoringPolicy(models.Model):
+    """
+    How a semester's rankings are scored: CPS is the weighted sum of the
+    metric averages, tiers are assigned by the minimum CPS for A, B and C,
+    and clubs with fewer than `min_events` events stay Tier Pending.
+    Semesters without a policy use the defaults below.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    planning_weight = models.FloatField(default=1.0, validators=[MinValueValidator(0)])
+    execution_weight = models.FloatField(default=1.0, validators=[MinValueValidator(0)])
+    documentation_weight = models.FloatField(default=1.0, validators=[MinValueValidator(0)])
+    innovation_weight = models.FloatField(default=1.0, validators=[MinValueValidator(0)])
+    turnout_weight = models.FloatField(default=1.0, validators=[MinValueValidator(0)])
+    tier_a_min = models.FloatField(default=90.0)
+    tier_b_min = models.FloatField(default=75.0)
+    tier_c_min = models.FloatField(default=60.0)
+    min_events = models.PositiveIntegerField(default=2, validators=[MinValueValidator(1)])
+    # Bumped on every save; recorded with each recalculation in the audit log
+    version = models.PositiveIntegerField(default=1, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'scoring policies'
+
+    def __str__(self):
+        return f"{self.name} (v{self.version})"
+
+    def clean(self):
+        if not self.tier_a_min > self.tier_b_min > self.tier_c_min:
+            raise ValidationError("Tier thresholds must decrease from A to C.")
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+def ranking_version_now():
+    # Millisecond timestamps, so a ranking version doubles as Last-Modified
+    return int(time.time() * 1000)
+
+class Semester(TrackedFieldsMixin, models.Model):
     name = models.CharField(max_length=50, unique=True)
     is_active = models.BooleanField(default=False)
+    scoring_policy = models.ForeignKey(
+        ScoringPolicy, on_delete=models.SET_NULL, null=True, blank=True, related_name='semesters',
+        help_text='Leave empty to use the default weights and tier thresholds.',
+    )
+    # Moved forward in the transaction of every change to the semester's
+    # rankings (caching.bump_ranking_version); cached ranking data, ETags and
+    # the dashboard's table fragment are keyed by it
+    ranking_version = models.BigIntegerField(default=ranking_version_now, editable=False)
 
     def __str__(self):
         return self.name
 
-class Club(models.Model):
+    def save(self, *args, **kwargs):
+        # The version is only ever bumped in SQL; saving an instance loaded
+        # before a bump mustn't write the older version back
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.attname for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname != 'ranking_version' and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+class Club(TrackedFieldsMixin, models.Model):
     name = models.CharField(max_length=100, unique=True)
     short_code = models.CharField(max_length=10, unique=True)
     faculty_incharge = models.CharField(max_length=100)
@@ -19,7 +135,21 @@ class Club(models.Model):
     def __str__(self):
         return self.name
 
-class Event(models.Model):
+class EventQuerySet(models.QuerySet):
+    def with_total_score(self):
+        """
+        Annotates `total`, the sum of the five scores computed in the
+        database, so it can be filtered and sorted on in SQL.
+        """
+        return self.annotate(total=TOTAL_SCORE)
+
+# Database-side equivalent of Event.total_score
+TOTAL_SCORE = (
+    models.F('planning_score') + models.F('execution_score') + models.F('documentation_score')
+    + models.F('innovation_score') + models.F('turnout_score')
+)
+
+class Event(TrackedFieldsMixin, models.Model):
     club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='events')
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='events')
     name = models.CharField(max_length=200)
@@ -34,9 +164,27 @@ class Event(models.Model):
     innovation_score = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(20)])
     turnout_score = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(20)])
 
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # CPS aggregation: filter(club=..., semester=...) and per-semester scans
+            models.Index(fields=['semester', 'club'], name='event_semester_club_idx'),
+            # Keyset pagination of a club's events: filter(club, semester).order_by('date', 'id')
+            models.Index(fields=['club', 'semester', 'date', 'id'], name='event_club_sem_date_idx'),
+            # Unfiltered admin changelist, newest first
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.club.short_code}"
 
+    def save(self, *args, **kwargs):
+        # The signal handlers lock and read the stored row, then apply the
+        # difference to the rankings: all of it commits with the write or not at all
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     @property
     def total_score(self):
         return (
@@ -70,18 +218,140 @@ class Ranking(models.Model):
     avg_innovation = models.FloatField(default=0.0)
     avg_turnout = models.FloatField(default=0.0)
 
+    # Running score totals, kept in step with event saves/deletes so CPS can be
+    # updated incrementally instead of re-aggregating every event
+    sum_planning = models.IntegerField(default=0)
+    sum_execution = models.IntegerField(default=0)
+    sum_documentation = models.IntegerField(default=0)
+    sum_innovation = models.IntegerField(default=0)
+    sum_turnout = models.IntegerField(default=0)
+
     class Meta:
         unique_together = ('club', 'semester')
         ordering = ['rank']
+        indexes = [
+            # Rank assignment: filter(semester=...).order_by('-cps', ...)
+            models.Index(fields=['semester', '-cps'], name='ranking_semester_cps_idx'),
+            # Dashboard/export: filter(semester=...).order_by('rank', ...)
+            models.Index(fields=['semester', 'rank'], name='ranking_semester_rank_idx'),
+        ]
 
     def __str__(self):
         return f"{self.club.short_code} - {self.semester} (Rank: {self.rank})"
 
+class ClubHistory(models.Model):
+    """
+    A club's result in one semester plus trend columns derived from its
+    earlier semesters, kept in step with Ranking whenever a semester is
+    re-ranked, so a club's full history is one indexed query.
+    """
+    club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='history')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='club_history')
+    cps = models.FloatField()
+    tier = models.CharField(max_length=1, choices=Ranking.TIER_CHOICES)
+    rank = models.PositiveIntegerField(null=True, blank=True)
+    event_count = models.PositiveIntegerField()
+
+    # Relative to the club's previous semester with a ranking (None for the first)
+    cps_change = models.FloatField(null=True, blank=True)
+    # +1 tier up, -1 tier down, 0 same; None when either tier is Pending
+    tier_change = models.SmallIntegerField(null=True, blank=True)
+    # Mean CPS over this and the club's previous semesters, HISTORY_WINDOW in all
+    cps_moving_avg = models.FloatField()
+    # Consecutive semesters at this tier, counting this one
+    tier_streak = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        verbose_name_plural = 'club history'
+        constraints = [
+            # Also the index behind filter(club=...).order_by('semester')
+            models.UniqueConstraint(fields=['club', 'semester'], name='clubhistory_club_semester_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.club} - {self.semester}"
+
+class RankingSnapshot(models.Model):
+    """
+    An append-only record of a semester's standings. A checkpoint holds the
+    whole table; the rows after it hold only the clubs whose rank, tier, CPS
+    or event count changed, so the table at any moment is the latest
+    checkpoint before it plus the deltas up to it.
+    """
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='ranking_snapshots')
+    recorded_at = models.DateTimeField(default=timezone.now)
+    is_checkpoint = models.BooleanField(default=False)
+    # {club_id: [rank, tier, cps, event_count]}, or null for a club that lost its ranking
+    rows = models.JSONField()
+    # Club entries written since the last checkpoint, including this one's (0 for a checkpoint)
+    changes_since_checkpoint = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['semester', 'recorded_at'], name='snapshot_semester_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.semester} at {self.recorded_at}"
+
+class RankingJob(models.Model):
+    """
+    A queued recalculation of one club's ranking in a semester, written by
+    the event signals when CTR_RANKING_QUEUE is on and run by
+    `manage.py run_ranking_worker`. There is one row per (club, semester):
+    saving again before a worker gets to it only moves requested_at.
+    """
+    club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name='+')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='ranking_jobs')
+    requested_at = models.DateTimeField(default=timezone.now)
+    # Set while a worker runs the job; claims older than CTR_RANKING_JOB_TIMEOUT are abandoned
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            # Also the index behind the dashboard's "pending refresh" check
+            models.UniqueConstraint(fields=['semester', 'club'], name='rankingjob_semester_club_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.club} - {self.semester}"
+
 class AuditLog(models.Model):
+    class Action(models.TextChoices):
+        EVENT_ADDED = 'event_added', 'Event Added'
+        EVENT_UPDATED = 'event_updated', 'Event Updated'
+        EVENT_DELETED = 'event_deleted', 'Event Deleted'
+        EVENTS_IMPORTED = 'events_imported', 'Events Imported'
+        SEMESTER_CALCULATION = 'semester_calculation', 'Semester Calculation'
+        CLUB_ADDED = 'club_added', 'Club Added'
+        CLUB_UPDATED = 'club_updated', 'Club Updated'
+        POLICY_UPDATED = 'policy_updated', 'Scoring Policy Updated'
+        OTHER = 'other', 'Other'
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    action = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    action = models.CharField(max_length=32, choices=Action.choices)
+    # Set when the entry is logged, not when a buffered batch is written
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    # The object the entry is about. object_id survives the object being deleted.
+    content_type = models.ForeignKey(ContentType, on_delete=models.SET_NULL, null=True, blank=True)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)
+    target = GenericForeignKey('content_type', 'object_id')
+    club = models.ForeignKey(Club, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
+
+    # Structured payload, e.g. {"planning_score": [12, 15]} for field changes
+    data = models.JSONField(default=dict, blank=True)
     details = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='auditlog_timestamp_idx'),
+            models.Index(fields=['action', 'timestamp'], name='auditlog_action_time_idx'),
+            models.Index(fields=['content_type', 'object_id'], name='auditlog_target_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.user} - {self.action} - {self.timestamp}"
+        return f"{self.user} - {self.get_action_display()} - {self.timestamp}"
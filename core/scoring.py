@@ -0,0 +1,69 @@
+import threading
+from bisect import bisect_right
+from .models import ScoringPolicy
+
+METRICS = ['planning', 'execution', 'documentation', 'innovation', 'turnout']
+
+class CompiledPolicy:
+    """
+    A ScoringPolicy reduced to what scoring needs: a weight per metric and
+    the tier thresholds in ascending order, so the tier is a single bisect.
+    """
+    TIERS = ('D', 'C', 'B', 'A')
+
+    def __init__(self, weights, tier_a_min, tier_b_min, tier_c_min, min_events, policy_id=None, version=None, stamp=None):
+        self.weights = tuple(weights)
+        self.thresholds = (tier_c_min, tier_b_min, tier_a_min)
+        self.min_events = min_events
+        self.policy_id = policy_id
+        self.version = version
+        # (version, updated_at) of the row it was compiled from
+        self.stamp = stamp
+
+    @classmethod
+    def from_policy(cls, policy):
+        return cls(
+            [getattr(policy, f'{metric}_weight') for metric in METRICS],
+            policy.tier_a_min, policy.tier_b_min, policy.tier_c_min, policy.min_events,
+            policy_id=policy.pk, version=policy.version, stamp=(policy.version, policy.updated_at),
+        )
+
+    def cps(self, averages):
+        return sum(weight * avg for weight, avg in zip(self.weights, averages))
+
+    def tier(self, cps, event_count):
+        # FR-12: a club needs a minimum number of events to be tiered
+        if event_count < self.min_events:
+            return 'P'
+        return self.TIERS[bisect_right(self.thresholds, cps)]
+
+DEFAULT_POLICY = CompiledPolicy([1.0] * len(METRICS), 90.0, 75.0, 60.0, 2)
+
+_policies = {}
+_lock = threading.Lock()
+
+def get_policy(policy_id):
+    """
+    The compiled policy for a ScoringPolicy id (DEFAULT_POLICY for None).
+    Compiled policies are kept per process, but every call checks the
+    policy's version and updated_at in the database first, so a policy saved
+    by another process is used from its next calculation on.
+    """
+    if policy_id is None:
+        return DEFAULT_POLICY
+    stamp = ScoringPolicy.objects.filter(pk=policy_id).values_list('version', 'updated_at').first()
+    if stamp is None:
+        return DEFAULT_POLICY
+    with _lock:
+        policy = _policies.get(policy_id)
+    if policy is None or policy.stamp != stamp:
+        try:
+            policy = CompiledPolicy.from_policy(ScoringPolicy.objects.get(pk=policy_id))
+        except ScoringPolicy.DoesNotExist:
+            return DEFAULT_POLICY
+        with _lock:
+            _policies[policy_id] = policy
+    return policy
+
+def get_semester_policy(semester):
+    return get_policy(semester.scoring_policy_id)
@@ -0,0 +1,102 @@
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+from django.db import connection
+from django.utils import timezone
+from .audit import audit_buffer
+from .models import Club, Semester, Event, AuditLog
+from .services import METRICS, recompute_semester
+
+def seed_dataset(clubs, semesters, events_per_club, seed=0, audit_logs=0, prefix='Bench', batch_size=5000):
+    """
+    Creates a deterministic synthetic dataset for benchmarks: `clubs` clubs,
+    each with `events_per_club` scored events in every one of `semesters`
+    semesters, plus optional audit log rows. Rows are inserted with
+    bulk_create, so no signals fire; rankings are rebuilt once at the end.
+
+    Returns (semesters, clubs).
+    """
+    rng = random.Random(seed)
+
+    semester_objs = Semester.objects.bulk_create(
+        Semester(name=f"{prefix} Semester {i + 1:02d}", is_active=(i == semesters - 1))
+        for i in range(semesters)
+    )
+    club_objs = Club.objects.bulk_create(
+        Club(
+            name=f"{prefix} Club {i + 1:05d}",
+            short_code=f"{prefix[:3].upper()}{i + 1:05d}",
+            faculty_incharge=f"Faculty {i + 1}",
+            student_lead=f"Student {i + 1}",
+            contact_details=f"club{i + 1}@example.com",
+        )
+        for i in range(clubs)
+    )
+    # Some clubs are consistently stronger than others so every tier shows up
+    strength = {club.pk: rng.randint(6, 19) for club in club_objs}
+
+    def events():
+        start = date(2020, 1, 1)
+        for s, semester in enumerate(semester_objs):
+            for club in club_objs:
+                for i in range(events_per_club):
+                    scores = {
+                        f'{metric}_score': min(20, max(0, strength[club.pk] + rng.randint(-4, 4)))
+                        for metric in METRICS
+                    }
+                    expected = rng.randint(20, 300)
+                    yield Event(
+                        club_id=club.pk,
+                        semester_id=semester.pk,
+                        name=f"Event {i + 1}",
+                        date=start + timedelta(days=s * 180 + i % 180),
+                        expected_turnout=expected,
+                        actual_turnout=rng.randint(expected // 2, expected),
+                        **scores,
+                    )
+
+    _bulk_insert(Event, events(), batch_size)
+
+    if audit_logs:
+        actions = [
+            AuditLog.Action.EVENT_ADDED, AuditLog.Action.EVENT_UPDATED,
+            AuditLog.Action.SEMESTER_CALCULATION, AuditLog.Action.CLUB_UPDATED,
+        ]
+        now = timezone.now()
+        logs = (
+            AuditLog(
+                action=rng.choice(actions),
+                details=f"Synthetic entry {i}",
+                timestamp=now - timedelta(minutes=audit_logs - i),
+            )
+            for i in range(audit_logs)
+        )
+        _bulk_insert(AuditLog, logs, batch_size)
+
+    for semester in semester_objs:
+        recompute_semester(semester)
+    return semester_objs, club_objs
+
+def _bulk_insert(model, objs, batch_size):
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+@contextmanager
+def throwaway_database():
+    """
+    Runs the block against a freshly migrated test database that is dropped
+    afterwards, so benchmarks never touch real data.
+    """
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+        # Write queued audit entries while the test database still exists
+        audit_buffer.flush()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -1,188 +1,755 @@
-from django.db.models import Avg, Count
-from django.db.models.signals import post_save, post_delete, pre_save
+import functools
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ContextDecorator
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction, IntegrityError, OperationalError
+from django.db.models import Count, Sum, F
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
-from .models import Event, Ranking, Club, Semester, AuditLog
+from .models import Event, Ranking, Club, Semester, ScoringPolicy, AuditLog
 from .middleware import get_current_user
+from .caching import bump_ranking_version
+from .history import update_club_history
+from .snapshots import record_ranking_snapshot
+from .audit import audit_buffer
+from .jobs import complete_ranking_jobs, enqueue_ranking_jobs, release_ranking_jobs
+from .metrics import timed_handler
+from .scoring import METRICS, DEFAULT_POLICY, CompiledPolicy, get_semester_policy
 
-def create_audit_log(instance, action, details):
+logger = logging.getLogger(__name__)
+
+def create_audit_log(instance, action, details, data=None):
+    """
+    Records an AuditLog entry. `instance` is the object the entry is about
+    (or None), `action` an AuditLog.Action and `data` an optional JSON
+    payload such as {field: [old, new]} for changed fields.
+    """
     user = get_current_user()
     # If called from shell/test where no middleware, user might be None
     # Just try to handle it gracefully
     if user and not user.is_authenticated:
         user = None
 
-    AuditLog.objects.create(
+    entry = AuditLog(
         user=user,
         action=action,
-        details=details
+        details=details,
+        data=data or {},
     )
+    if instance is not None and instance.pk is not None:
+        entry.content_type = ContentType.objects.get_for_model(instance)
+        entry.object_id = instance.pk
+        entry.club_id = instance.pk if isinstance(instance, Club) else getattr(instance, 'club_id', None)
+    if settings.CTR_AUDIT_BUFFERED:
+        # Queued once the change is committed (dropped if it rolls back) and
+        # written in batches by core.audit
+        transaction.on_commit(lambda: audit_buffer.add(entry))
+    else:
+        entry.save()
+
+# Attempts at a unit of ranking work that keeps hitting lock conflicts
+CONFLICT_ATTEMPTS = 5
+# SQLSTATEs of PostgreSQL serialization failures and deadlocks
+CONFLICT_SQLSTATES = {'40001', '40P01'}
+
+def is_conflict(error):
+    """
+    Whether a database error just means "try again": a serialization
+    failure or deadlock on PostgreSQL, a busy database on SQLite.
+    """
+    cause = error.__cause__
+    sqlstate = getattr(cause, 'pgcode', None) or getattr(cause, 'sqlstate', None)
+    if sqlstate:
+        return sqlstate in CONFLICT_SQLSTATES
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
 
+def retry_on_conflict(func):
+    """
+    Runs `func` in a transaction (a savepoint inside an open one) and runs it
+    again after a short randomized backoff when the database reports a
+    conflict. A failed attempt's writes and on_commit callbacks are rolled
+    back with it.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, CONFLICT_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == CONFLICT_ATTEMPTS or not is_conflict(e):
+                    raise
+            time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+    return wrapper
+
+def lock_semester(semester):
+    """
+    Holds a semester's ranking lock until the transaction ends. Everything
+    that writes a semester's rankings takes it first, so concurrent requests
+    score and rank one semester one at a time, each seeing what the previous
+    one committed, while other semesters go ahead in parallel; always
+    taking it before any Ranking row also rules out deadlocks between them.
+
+    PostgreSQL locks the semester's row FOR NO KEY UPDATE, which doesn't
+    block events being inserted for the semester. SQLite has no row locks;
+    a no-op write takes its database write lock up front instead, which
+    also keeps the transaction from failing later when it would have to
+    upgrade a read lock.
+    """
+    lock_rows(Semester.objects.filter(pk=semester.pk))
+
+def lock_rows(queryset):
+    """
+    Locks the rows of `queryset` until the transaction ends, the way
+    lock_semester() locks a semester.
+    """
+    if connection.features.has_select_for_update:
+        list(queryset.select_for_update(no_key=connection.features.has_select_for_no_key_update).values_list('pk'))
+    else:
+        queryset.update(id=F('id'))
+
+def get_tier(cps, event_count, policy=DEFAULT_POLICY):
+    # FR-12: Minimum events (2 by default), then the policy's CPS thresholds
+    return policy.tier(cps, event_count)
+
+def apply_running_sums(ranking, policy):
+    """
+    Derives the averages, CPS and Tier of a Ranking from its running sums
+    under the semester's compiled scoring policy.
+    """
+    averages = []
+    for metric in METRICS:
+        avg = getattr(ranking, f'sum_{metric}') / ranking.event_count
+        setattr(ranking, f'avg_{metric}', avg)
+        averages.append(avg)
+    ranking.cps = policy.cps(averages)
+    ranking.tier = policy.tier(ranking.cps, ranking.event_count)
+
+def log_calculation(club, semester, ranking, policy):
+    action = AuditLog.Action.SEMESTER_CALCULATION
+    details = f"Recalculated for {club.short_code} in {semester}. CPS: {ranking.cps}, Tier: {ranking.tier}"
+    data = {
+        'semester_id': semester.pk, 'event_count': ranking.event_count, 'cps': ranking.cps, 'tier': ranking.tier,
+        'policy_version': policy.version,
+    }
+    create_audit_log(ranking, action, details, data)
+
+@retry_on_conflict
 def calculate_club_performance(club, semester):
     """
     Calculates CPS and assigns Tier for a club in a given semester.
     Updates or creates the Ranking object.
     """
-    events = Event.objects.filter(club=club, semester=semester)
-    event_count = events.count()
+    # The events are read under the lock, so they include everything
+    # committed by whoever held it before
+    lock_semester(semester)
+    totals = Event.objects.filter(club=club, semester=semester).aggregate(
+        event_count=Count('id'),
+        **{f'sum_{metric}': Sum(f'{metric}_score') for metric in METRICS}
+    )
+    event_count = totals['event_count']
 
     if event_count == 0:
         # Reset ranking if no events
         Ranking.objects.filter(club=club, semester=semester).delete()
         return
 
-    averages = events.aggregate(
-        avg_planning=Avg('planning_score'),
-        avg_execution=Avg('execution_score'),
-        avg_documentation=Avg('documentation_score'),
-        avg_innovation=Avg('innovation_score'),
-        avg_turnout=Avg('turnout_score')
-    )
-
-    avg_planning = averages['avg_planning'] or 0
-    avg_execution = averages['avg_execution'] or 0
-    avg_documentation = averages['avg_documentation'] or 0
-    avg_innovation = averages['avg_innovation'] or 0
-    avg_turnout = averages['avg_turnout'] or 0
-
-    cps = avg_planning + avg_execution + avg_documentation + avg_innovation + avg_turnout
-
-    # Tier Assignment
-    # FR-12: Minimum 2 events
-    if event_count < 2:
-        tier = 'P' # Pending
-    else:
-        if cps >= 90:
-            tier = 'A'
-        elif cps >= 75:
-            tier = 'B'
-        elif cps >= 60:
-            tier = 'C'
-        else:
-            tier = 'D'
+    ranking = Ranking(club=club, semester=semester, event_count=event_count)
+    for metric in METRICS:
+        setattr(ranking, f'sum_{metric}', totals[f'sum_{metric}'] or 0)
+    policy = get_semester_policy(semester)
+    apply_running_sums(ranking, policy)
 
     ranking, created = Ranking.objects.update_or_create(
         club=club,
         semester=semester,
         defaults={
-            'cps': cps,
-            'tier': tier,
-            'event_count': event_count,
-            'avg_planning': avg_planning,
-            'avg_execution': avg_execution,
-            'avg_documentation': avg_documentation,
-            'avg_innovation': avg_innovation,
-            'avg_turnout': avg_turnout,
+            field: getattr(ranking, field)
+            for field in ['cps', 'tier', 'event_count']
+            + [f'avg_{metric}' for metric in METRICS]
+            + [f'sum_{metric}' for metric in METRICS]
         }
     )
 
     # Audit Log for Calculation
-    action = "Semester Calculation"
-    details = f"Recalculated for {club.short_code} in {semester}. CPS: {cps}, Tier: {tier}"
-    create_audit_log(ranking, action, details)
+    log_calculation(club, semester, ranking, policy)
 
     return ranking
 
-def update_semester_ranks(semester):
+@retry_on_conflict
+def apply_club_delta(club, semester, count_delta, score_deltas):
+    """
+    Incrementally updates a club's Ranking by adding `count_delta` events and
+    `score_deltas` (one value per metric) to its running sums, without
+    re-reading the club's events.
+    """
+    updates = {'event_count': F('event_count') + count_delta}
+    for metric, delta in zip(METRICS, score_deltas):
+        updates[f'sum_{metric}'] = F(f'sum_{metric}') + delta
+
+    lock_semester(semester)
+    if Ranking.objects.filter(club=club, semester=semester).update(**updates):
+        ranking = Ranking.objects.get(club=club, semester=semester)
+    elif count_delta > 0:
+        ranking = Ranking(club=club, semester=semester, event_count=count_delta)
+        for metric, delta in zip(METRICS, score_deltas):
+            setattr(ranking, f'sum_{metric}', delta)
+    else:
+        # Nothing to subtract from: the stored totals have drifted
+        return calculate_club_performance(club, semester)
+
+    if ranking.event_count <= 0:
+        ranking.delete()
+        return
+
+    policy = get_semester_policy(semester)
+    apply_running_sums(ranking, policy)
+    try:
+        with transaction.atomic():
+            ranking.save()
+    except IntegrityError:
+        # A writer that doesn't take the semester lock created the row first
+        return calculate_club_performance(club, semester)
+
+    log_calculation(club, semester, ranking, policy)
+
+    return ranking
+
+@retry_on_conflict
+def update_semester_ranks(semester, rescored=()):
     """
     Updates the 'rank' field for all clubs in the semester based on CPS.
+    Clubs with the highest CPS rank first, ties are broken by club name, and
+    Tier Pending clubs get no rank (FR-12: a club needs at least 2 events
+    to receive a ranking). Only rows whose rank changes are written.
+
+    `rescored` are the ids of the clubs whose Ranking was recalculated (or
+    removed) before this call, or None for all of them; their ClubHistory is
+    brought up to date along with the clubs whose rank changed, and whatever
+    changed is appended to the semester's ranking snapshots.
+
+    Returns a dict of {club_id: new rank} for the rows that changed.
     """
-    # Added secondary sort by club name for deterministic ordering
+    # Ranks are a function of every club's CPS: numbering them under the
+    # semester lock keeps concurrent requests from each writing ranks
+    # computed from a different snapshot
+    lock_semester(semester)
+    rankings_changed(semester)
+    if connection.vendor == 'postgresql':
+        changed = _update_semester_ranks_sql(semester)
+    else:
+        changed = _update_semester_ranks_python(semester)
+    changes = update_club_history(semester, None if rescored is None else set(rescored) | set(changed))
+    record_ranking_snapshot(semester, changes)
+    return changed
+
+def _update_semester_ranks_python(semester):
     rankings = Ranking.objects.filter(semester=semester).order_by('-cps', 'club__name')
+    changed = []
     current_rank = 1
-    for r in rankings:
-        # Only assign rank if they are not pending (or maybe pending clubs get bottom rank?)
-        # SRS FR-07: Highest CPS -> Rank 1. Doesn't mention excluding pending.
-        # But FR-12 says "tier is marked as Tier Pending".
-        # Assuming pending clubs are still ranked by CPS or excluded?
-        # Usually pending means "not yet ranked".
-        # Let's rank them by CPS anyway, but they show as Pending Tier.
-        if r.tier == 'P':
-             r.rank = None # Or maybe put at the bottom?
-             # SRS doesn't specify. I'll leave rank as None or just rank them.
-             # "System must generate ranked list of clubs".
-             # If I have 1 event with 100 CPS, do I beat 2 events with 80 CPS?
-             # FR-12 says "A club must complete at least 2 events... to receive a ranking."
-             # This implies pending clubs do NOT receive a rank.
-             r.rank = None
+    for ranking in rankings.only('id', 'club_id', 'tier', 'rank'):
+        if ranking.tier == 'P':
+            new_rank = None
         else:
-            r.rank = current_rank
+            new_rank = current_rank
             current_rank += 1
-        r.save()
+        if ranking.rank != new_rank:
+            ranking.rank = new_rank
+            changed.append(ranking)
+
+    Ranking.objects.bulk_update(changed, ['rank'], batch_size=500)
+    return {r.club_id: r.rank for r in changed}
+
+def rankings_changed(semester):
+    """
+    Runs whenever a semester's rankings are recalculated: bumps its ranking
+    version in the same transaction, which invalidates the cached dashboard
+    data in every process once the change is committed.
+    """
+    bump_ranking_version(semester.pk)
+
+# Numbers the non-pending rankings of a semester by (-cps, club name) with a
+# window function and writes only the ranks that differ, all in one statement.
+RANK_UPDATE_SQL = """
+    WITH ordered AS (
+        SELECT r.id, CASE WHEN r.tier = 'P' THEN NULL ELSE
+                   ROW_NUMBER() OVER (PARTITION BY r.tier = 'P' ORDER BY r.cps DESC, c.name ASC)
+               END AS new_rank
+        FROM core_ranking r
+        JOIN core_club c ON c.id = r.club_id
+        WHERE r.semester_id = %s
+    )
+    UPDATE core_ranking
+    SET rank = ordered.new_rank
+    FROM ordered
+    WHERE core_ranking.id = ordered.id
+      AND core_ranking.rank IS DISTINCT FROM ordered.new_rank
+    RETURNING core_ranking.club_id, core_ranking.rank
+"""
+
+def _update_semester_ranks_sql(semester):
+    with connection.cursor() as cursor:
+        cursor.execute(RANK_UPDATE_SQL, [semester.pk])
+        return dict(cursor.fetchall())
+
+def find_ranking_drift(semester=None):
+    """
+    Recomputes event counts and score sums from scratch and compares them with
+    the running sums stored on Ranking. Returns a list of
+    (club_id, semester_id, stored, actual) tuples, where stored/actual are
+    (event_count, sum_planning, ..., sum_turnout) or None when missing.
+    """
+    events = Event.objects.all()
+    rankings = Ranking.objects.all()
+    if semester is not None:
+        events = events.filter(semester=semester)
+        rankings = rankings.filter(semester=semester)
+
+    sum_fields = [f'sum_{metric}' for metric in METRICS]
+    actual = {
+        (row['club_id'], row['semester_id']): tuple(row[f] for f in ['event_count'] + sum_fields)
+        for row in events.values('club_id', 'semester_id').annotate(
+            event_count=Count('id'),
+            **{f'sum_{metric}': Sum(f'{metric}_score') for metric in METRICS}
+        )
+    }
+    stored = {
+        (row[0], row[1]): tuple(row[2:])
+        for row in rankings.values_list('club_id', 'semester_id', 'event_count', *sum_fields)
+    }
+
+    drift = []
+    for pair in sorted(set(actual) | set(stored)):
+        if actual.get(pair) != stored.get(pair):
+            drift.append((pair[0], pair[1], stored.get(pair), actual.get(pair)))
+    return drift
+
+# rebuild_rankings() switches to recompute_semester() for this many clubs
+RECOMPUTE_SEMESTER_THRESHOLD = 20
+
+def rebuild_rankings(pairs):
+    """
+    Recalculates the given (club_id, semester_id) pairs from scratch and
+    re-ranks every semester involved.
+    """
+    pairs = set(pairs)
+    clubs = Club.objects.in_bulk({club_id for club_id, _ in pairs})
+    semesters = Semester.objects.in_bulk({semester_id for _, semester_id in pairs})
+    per_semester = Counter(semester_id for _, semester_id in pairs)
+    for semester_id, semester in semesters.items():
+        # Past a handful of clubs one aggregate over the semester beats a query per club
+        if per_semester[semester_id] >= RECOMPUTE_SEMESTER_THRESHOLD:
+            recompute_semester(semester)
+            continue
+        club_ids = sorted(club_id for club_id, pair_semester_id in pairs if pair_semester_id == semester_id)
+        for club_id in club_ids:
+            if club_id in clubs:
+                calculate_club_performance(clubs[club_id], semester)
+        update_semester_ranks(semester, club_ids)
+
+def run_ranking_jobs(jobs):
+    """
+    Runs claimed RankingJobs (see jobs.py), one semester at a time. Returns
+    the number of jobs that failed; they go back to the queue.
+    """
+    by_semester = defaultdict(list)
+    for job in jobs:
+        by_semester[job.semester_id].append(job)
+    failed = 0
+    for semester_id, semester_jobs in sorted(by_semester.items()):
+        try:
+            _run_semester_jobs(semester_jobs)
+        except Exception as e:
+            logger.exception("Ranking jobs for semester %s failed", semester_id)
+            release_ranking_jobs(semester_jobs, e)
+            failed += len(semester_jobs)
+    return failed
+
+@retry_on_conflict
+def _run_semester_jobs(jobs):
+    # The new rankings, their version bump and the removal of the jobs commit
+    # together, so a dashboard never shows the refresh as pending once it's done
+    rebuild_rankings({(job.club_id, job.semester_id) for job in jobs})
+    complete_ranking_jobs(jobs)
+
+RANKING_SCORE_FIELDS = (
+    ['event_count', 'cps', 'tier']
+    + [f'avg_{metric}' for metric in METRICS]
+    + [f'sum_{metric}' for metric in METRICS]
+)
+
+@retry_on_conflict
+def recompute_semester(semester, policy=None, from_events=True):
+    """
+    Rebuilds every Ranking of a semester from its events with a single
+    GROUP BY club aggregate, writes only the rows that changed in bulk and
+    re-ranks the semester. With from_events=False the stored running sums are
+    rescored instead, which is all a scoring policy change needs. `policy`
+    defaults to the semester's compiled policy.
+
+    Returns a list of (club_id, (old tier, old rank), (new tier, new rank))
+    for the clubs whose tier or rank changed; a missing ranking is None.
+    """
+    policy = policy or get_semester_policy(semester)
+    sum_fields = [f'sum_{metric}' for metric in METRICS]
+    totals = Event.objects.filter(semester=semester).values('club_id').annotate(
+        event_count=Count('id'),
+        **{f'sum_{metric}': Sum(f'{metric}_score') for metric in METRICS}
+    ).order_by()
+
+    lock_semester(semester)
+    existing = {r.club_id: r for r in Ranking.objects.filter(semester=semester)}
+    before = {club_id: (r.tier, r.rank) for club_id, r in existing.items()}
+    if not from_events:
+        totals = [
+            {'club_id': r.club_id, 'event_count': r.event_count, **{f: getattr(r, f) for f in sum_fields}}
+            for r in existing.values()
+        ]
+
+    to_create = []
+    to_update = []
+    for row in totals:
+        ranking = existing.pop(row['club_id'], None)
+        if ranking is None:
+            ranking = Ranking(club_id=row['club_id'], semester=semester)
+            to_create.append(ranking)
+        old_values = [getattr(ranking, field) for field in RANKING_SCORE_FIELDS]
+
+        ranking.event_count = row['event_count']
+        for metric in METRICS:
+            setattr(ranking, f'sum_{metric}', row[f'sum_{metric}'] or 0)
+        apply_running_sums(ranking, policy)
+        if ranking.pk and old_values != [getattr(ranking, field) for field in RANKING_SCORE_FIELDS]:
+            to_update.append(ranking)
+
+    # Whatever is left has no events any more
+    Ranking.objects.filter(pk__in=[r.pk for r in existing.values()]).delete()
+    Ranking.objects.bulk_update(to_update, RANKING_SCORE_FIELDS, batch_size=500)
+    Ranking.objects.bulk_create(to_create, batch_size=500)
+
+    after = {
+        club_id: (tier, rank)
+        for club_id, tier, rank in Ranking.objects.filter(semester=semester).values_list('club_id', 'tier', 'rank')
+    }
+    after.update({
+        club_id: (after[club_id][0], rank)
+        for club_id, rank in update_semester_ranks(
+            semester, {r.club_id for r in to_create + to_update} | set(existing)
+        ).items()
+    })
+
+    create_audit_log(
+        semester, AuditLog.Action.SEMESTER_CALCULATION,
+        f"Recomputed all rankings for {semester}: {len(to_create)} created, "
+        f"{len(to_update)} updated, {len(existing)} removed.",
+        {
+            'semester_id': semester.pk, 'created': len(to_create), 'updated': len(to_update),
+            'removed': len(existing), 'policy_version': policy.version,
+        },
+    )
+
+    return [
+        (club_id, before.get(club_id), after.get(club_id))
+        for club_id in sorted(set(before) | set(after))
+        if before.get(club_id) != after.get(club_id)
+    ]
+
+_deferred = threading.local()
+
+class RankingBatch:
+    """
+    The (club_id, semester_id) pairs touched while ranking is deferred.
+    """
+    def __init__(self):
+        self.pairs = set()
+
+    def add(self, club_id, semester_id):
+        self.pairs.add((club_id, semester_id))
+
+    def flush(self):
+        pairs, self.pairs = self.pairs, set()
+        if pairs and settings.CTR_RANKING_QUEUE:
+            enqueue_ranking_jobs(pairs)
+        elif pairs:
+            rebuild_rankings(pairs)
+
+class defer_ranking(ContextDecorator):
+    """
+    Coalesces ranking recalculation for batches of event changes. Inside the
+    block, event saves/deletes only record the (club, semester) pairs they
+    touch; once the outermost block exits and the surrounding transaction
+    commits, each pair is recalculated once and each semester re-ranked once.
+
+        with defer_ranking():
+            for row in rows:
+                Event.objects.create(**row)
+
+    Can also be used as a decorator. Nested blocks join the outermost batch.
+    """
+    def __enter__(self):
+        self.batch = getattr(_deferred, 'batch', None)
+        self.owner = self.batch is None
+        if self.owner:
+            self.batch = _deferred.batch = RankingBatch()
+        return self.batch
+
+    def __exit__(self, *exc_info):
+        if self.owner:
+            _deferred.batch = None
+            # Runs immediately when no transaction is open
+            transaction.on_commit(self.batch.flush)
+        return False
+
+    def _recreate_cm(self):
+        # Each decorated call needs its own state
+        return type(self)()
+
+def _event_scores(event):
+    return [getattr(event, f'{metric}_score') for metric in METRICS]
+
+def get_previous_values(instance, fields):
+    """
+    The values `fields` had before the pending save: taken from the snapshot
+    of a tracked model, or queried for instances that weren't loaded from the
+    database. Returns None if the row doesn't exist.
+    """
+    previous = instance.get_loaded_values(fields)
+    if previous is None:
+        previous = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    return previous
+
+EVENT_AUDIT_FIELDS = ['planning_score', 'execution_score', 'documentation_score', 'innovation_score', 'turnout_score']
+
+def is_written(field, update_fields):
+    """
+    Whether a save with `update_fields` (names or attnames, None for all)
+    writes the field with attname `field`.
+    """
+    return update_fields is None or field in update_fields or field.removesuffix('_id') in update_fields
 
 @receiver(pre_save, sender=Event)
-def event_pre_save_handler(sender, instance, **kwargs):
+@timed_handler
+def event_pre_save_handler(sender, instance, update_fields=None, **kwargs):
+    # Don't carry a diff over from an earlier save of the same instance
+    instance.__dict__.pop('_audit_changes', None)
+    instance.__dict__.pop('_saved_scores', None)
     if instance.pk:
-        try:
-            old_instance = Event.objects.get(pk=instance.pk)
-            # Store diff in instance for post_save to use
-            changes = []
-            for field in ['planning_score', 'execution_score', 'documentation_score', 'innovation_score', 'turnout_score', 'total_score']:
-                if field == 'total_score': continue
-                old_val = getattr(old_instance, field)
-                new_val = getattr(instance, field)
-                if old_val != new_val:
-                    changes.append(f"{field}: {old_val} -> {new_val}")
-
-            if changes:
-                instance._audit_changes = "; ".join(changes)
-        except Event.DoesNotExist:
-            pass
+        fields = ['club_id', 'semester_id'] + EVENT_AUDIT_FIELDS
+        # The deltas must undo what the running sums hold, which is the stored
+        # row: the instance may have been loaded before someone else's save.
+        # The snapshot only stands in when the save writes none of them.
+        old_values = None
+        if update_fields is not None and not any(is_written(field, update_fields) for field in fields):
+            old_values = instance.get_loaded_values(fields)
+        if old_values is None:
+            # Locked until the save commits (Event.save is atomic), so a
+            # concurrent save of the event waits and then reads this one's row
+            stored = Event.objects.filter(pk=instance.pk)
+            lock_rows(stored)
+            old_values = stored.values(*fields).first()
+        if old_values is None:
+            return
+        # Remember what the event contributed before this save for incremental CPS
+        instance._previous_scores = (
+            old_values['club_id'], old_values['semester_id'], [old_values[f'{metric}_score'] for metric in METRICS]
+        )
+        # With update_fields, the fields left out keep their stored values
+        # whatever the instance holds
+        saved = {
+            field: getattr(instance, field) if is_written(field, update_fields) else old_values[field]
+            for field in fields
+        }
+        if update_fields is not None:
+            instance._saved_scores = (
+                saved['club_id'], saved['semester_id'], [saved[f'{metric}_score'] for metric in METRICS]
+            )
+        # Store diff in instance for post_save to use
+        changes = []
+        diff = {}
+        for field in EVENT_AUDIT_FIELDS:
+            old_val = old_values[field]
+            new_val = saved[field]
+            if old_val != new_val:
+                changes.append(f"{field}: {old_val} -> {new_val}")
+                diff[field] = [old_val, new_val]
+
+        if changes:
+            instance._audit_changes = "; ".join(changes)
+            instance._audit_diff = diff
 
 @receiver(post_save, sender=Event)
+@timed_handler
 def event_save_handler(sender, instance, created, **kwargs):
-    action = "Event Added" if created else "Event Updated"
-    details = f"Event: {instance.name} ({instance.club.short_code}). Score: {instance.total_score}"
+    action = AuditLog.Action.EVENT_ADDED if created else AuditLog.Action.EVENT_UPDATED
+    saved = getattr(instance, '_saved_scores', None)
+    total_score = sum(saved[2]) if saved else instance.total_score
+    club = instance.club if not saved or saved[0] == instance.club_id else Club.objects.get(pk=saved[0])
+    details = f"Event: {instance.name} ({club.short_code}). Score: {total_score}"
+    data = {'semester_id': saved[1] if saved else instance.semester_id, 'total_score': total_score}
 
     if not created and hasattr(instance, '_audit_changes'):
         details += f". Changes: {instance._audit_changes}"
+        data['changes'] = instance._audit_diff
 
-    create_audit_log(instance, action, details)
+    create_audit_log(instance, action, details, data)
 
-    event_update_handler(instance)
+    event_update_handler(instance, created=created)
 
 @receiver(post_delete, sender=Event)
+@timed_handler
 def event_delete_handler(sender, instance, **kwargs):
-    action = "Event Deleted"
+    action = AuditLog.Action.EVENT_DELETED
     details = f"Event: {instance.name} ({instance.club.short_code})"
-    create_audit_log(instance, action, details)
+    create_audit_log(instance, action, details, {'semester_id': instance.semester_id})
+
+    event_update_handler(instance, deleted=True)
+
+def event_update_handler(instance, created=False, deleted=False):
+    previous = None if created or deleted else getattr(instance, '_previous_scores', None)
+    # What the row holds now: a save with update_fields may have left some
+    # of the instance's values unwritten
+    club_id, semester_id, scores = instance.club_id, instance.semester_id, _event_scores(instance)
+    if previous:
+        club_id, semester_id, scores = getattr(instance, '_saved_scores', None) or (club_id, semester_id, scores)
+
+    batch = getattr(_deferred, 'batch', None)
+    if batch is not None:
+        # Inside defer_ranking(): recalculated once the batch is flushed
+        batch.add(club_id, semester_id)
+        if previous:
+            batch.add(previous[0], previous[1])
+        return
 
-    event_update_handler(instance)
+    if settings.CTR_RANKING_QUEUE:
+        # Recalculated by run_ranking_worker once the save is committed
+        enqueue_ranking_jobs({(club_id, semester_id), *([previous[:2]] if previous else [])})
+        return
+
+    club = instance.club if club_id == instance.club_id else Club.objects.get(pk=club_id)
+    semester = instance.semester if semester_id == instance.semester_id else Semester.objects.get(pk=semester_id)
 
-def event_update_handler(instance):
-    club = instance.club
-    semester = instance.semester
+    # The event may have been moved to another club or semester
+    moved_from = None
+    if previous and (previous[0], previous[1]) != (club_id, semester_id):
+        moved_from = (Club.objects.get(pk=previous[0]), Semester.objects.get(pk=previous[1]))
 
     # 1. Recalculate CPS/Tier for this club
-    calculate_club_performance(club, semester)
+    if not settings.CTR_INCREMENTAL_CPS or (not created and not deleted and previous is None):
+        if moved_from:
+            calculate_club_performance(*moved_from)
+        calculate_club_performance(club, semester)
+    else:
+        if created:
+            apply_club_delta(club, semester, 1, scores)
+        elif deleted:
+            apply_club_delta(club, semester, -1, [-s for s in scores])
+        elif moved_from:
+            apply_club_delta(*moved_from, -1, [-s for s in previous[2]])
+            apply_club_delta(club, semester, 1, scores)
+        else:
+            deltas = [new - old for new, old in zip(scores, previous[2])]
+            if not any(deltas):
+                # Nothing that feeds the CPS changed, but the version still
+                # has to move for the API's event listings
+                rankings_changed(semester)
+                return
+            apply_club_delta(club, semester, 0, deltas)
 
     # 2. Update Ranks for the whole semester
-    update_semester_ranks(semester)
+    rescored = {club.pk}
+    if moved_from:
+        if moved_from[1].pk != semester.pk:
+            update_semester_ranks(moved_from[1], [moved_from[0].pk])
+        else:
+            rescored.add(moved_from[0].pk)
+    update_semester_ranks(semester, rescored)
+
+CLUB_AUDIT_FIELDS = ['name', 'short_code', 'faculty_incharge', 'student_lead']
 
 @receiver(pre_save, sender=Club)
+@timed_handler
 def club_pre_save_handler(sender, instance, **kwargs):
+    instance.__dict__.pop('_audit_changes', None)
     if instance.pk:
-        try:
-            old_instance = Club.objects.get(pk=instance.pk)
-            changes = []
-            for field in ['name', 'short_code', 'faculty_incharge', 'student_lead']:
-                old_val = getattr(old_instance, field)
-                new_val = getattr(instance, field)
-                if old_val != new_val:
-                    changes.append(f"{field}: {old_val} -> {new_val}")
-            if changes:
-                instance._audit_changes = "; ".join(changes)
-        except Club.DoesNotExist:
-            pass
+        old_values = get_previous_values(instance, CLUB_AUDIT_FIELDS)
+        if old_values is None:
+            return
+        changes = []
+        diff = {}
+        for field in CLUB_AUDIT_FIELDS:
+            old_val = old_values[field]
+            new_val = getattr(instance, field)
+            if old_val != new_val:
+                changes.append(f"{field}: {old_val} -> {new_val}")
+                diff[field] = [old_val, new_val]
+        if changes:
+            instance._audit_changes = "; ".join(changes)
+            instance._audit_diff = diff
 
 @receiver(post_save, sender=Club)
+@timed_handler
 def club_save_handler(sender, instance, created, **kwargs):
     if created:
-        action = "Club Added"
+        action = AuditLog.Action.CLUB_ADDED
         details = f"Club: {instance.name}"
+        data = {}
     else:
-        action = "Club Updated"
+        action = AuditLog.Action.CLUB_UPDATED
         details = f"Club: {instance.name} details updated."
+        data = {}
         if hasattr(instance, '_audit_changes'):
             details += f" Changes: {instance._audit_changes}"
+            data['changes'] = instance._audit_diff
+            # The club's name and code are shown on every ranking table it appears in
+            for semester in Semester.objects.filter(rankings__club=instance):
+                rankings_changed(semester)
+
+    create_audit_log(instance, action, details, data)
+
+@receiver(post_save, sender=ScoringPolicy)
+@timed_handler
+def scoring_policy_save_handler(sender, instance, created, **kwargs):
+    # Every process recompiles it on its next use, seeing the new version
+    # Only the semesters using this policy are rescored, from their stored sums
+    semesters = list(instance.semesters.all())
+    policy = CompiledPolicy.from_policy(instance)
+    for semester in semesters:
+        recompute_semester(semester, policy, from_events=False)
+
+    create_audit_log(
+        instance, AuditLog.Action.POLICY_UPDATED,
+        f"Scoring policy {instance} saved; rescored {len(semesters)} semester(s).",
+        {'version': instance.version, 'semester_ids': [semester.pk for semester in semesters]},
+    )
+
+@receiver(pre_delete, sender=ScoringPolicy)
+@timed_handler
+def scoring_policy_pre_delete_handler(sender, instance, **kwargs):
+    # The semesters fall back to the default policy once the FK is cleared
+    instance._semester_ids = list(instance.semesters.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=ScoringPolicy)
+@timed_handler
+def scoring_policy_delete_handler(sender, instance, **kwargs):
+    for semester in Semester.objects.filter(pk__in=getattr(instance, '_semester_ids', [])):
+        recompute_semester(semester, DEFAULT_POLICY, from_events=False)
+
+@receiver(pre_save, sender=Semester)
+@timed_handler
+def semester_pre_save_handler(sender, instance, **kwargs):
+    instance.__dict__.pop('_policy_changed', None)
+    if instance.pk:
+        old_values = get_previous_values(instance, ['scoring_policy_id'])
+        if old_values is not None and old_values['scoring_policy_id'] != instance.scoring_policy_id:
+            instance._policy_changed = True
 
-    create_audit_log(instance, action, details)
+@receiver(post_save, sender=Semester)
+@timed_handler
+def semester_save_handler(sender, instance, created, **kwargs):
+    if getattr(instance, '_policy_changed', False):
+        recompute_semester(instance, from_events=False)
@@ -0,0 +1,202 @@
+import numpy as np
+from django.db.models import Count, Sum
+from .models import Event
+from .scoring import METRICS, get_semester_policy
+
+# Tier codes used in the arrays: the index into CompiledPolicy.TIERS, with
+# Pending last
+TIER_LABELS = ['D', 'C', 'B', 'A', 'P']
+PENDING = 4
+# Keeps the integer sort keys in evaluate() well inside int64
+MAX_WEIGHT = 100
+SCENARIO_KEYS = {'name', 'weights', 'tier_a_min', 'tier_b_min', 'tier_c_min', 'min_events'}
+
+class ScoreMatrix:
+    """
+    A semester's per-club metric averages (clubs x metrics) and event counts,
+    with clubs in name order so ties in CPS rank by name like
+    update_semester_ranks does.
+    """
+    def __init__(self, club_ids, short_codes, names, counts, averages):
+        self.club_ids = club_ids
+        self.short_codes = short_codes
+        self.names = names
+        self.counts = counts
+        self.averages = averages
+
+    def __len__(self):
+        return len(self.club_ids)
+
+def load_score_matrix(semester):
+    """
+    Reads a semester's scores with one GROUP BY club aggregate. CPS is linear
+    in the metric averages, so every scenario can be evaluated from these
+    without going back to the individual events.
+    """
+    rows = list(
+        Event.objects.filter(semester=semester)
+        .values('club_id', 'club__short_code', 'club__name')
+        .annotate(event_count=Count('id'), **{f'sum_{metric}': Sum(f'{metric}_score') for metric in METRICS})
+        .order_by('club__name')
+    )
+    counts = np.array([row['event_count'] for row in rows], dtype=np.int64)
+    sums = np.array([[row[f'sum_{metric}'] for metric in METRICS] for row in rows], dtype=np.float64)
+    return ScoreMatrix(
+        club_ids=[row['club_id'] for row in rows],
+        short_codes=[row['club__short_code'] for row in rows],
+        names=[row['club__name'] for row in rows],
+        counts=counts,
+        averages=sums.reshape(len(rows), len(METRICS)) / np.maximum(counts, 1)[:, None],
+    )
+
+def parse_scenarios(specs, base_policy):
+    """
+    Validates scenario dicts such as {"name": "...", "weights": {"turnout": 2},
+    "tier_a_min": 85} and fills anything missing from `base_policy`. Returns
+    (scenarios, weights S x metrics, thresholds S x 3 ascending, min_events S).
+    Raises ValueError for invalid input.
+    """
+    if not isinstance(specs, list) or not specs:
+        raise ValueError("Expected a non-empty list of scenarios.")
+    scenarios = []
+    weights = np.empty((len(specs), len(METRICS)))
+    thresholds = np.empty((len(specs), 3))
+    min_events = np.empty(len(specs), dtype=np.int64)
+
+    base_weights = dict(zip(METRICS, base_policy.weights))
+    base_c, base_b, base_a = base_policy.thresholds
+    for i, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Scenario {i + 1}: expected an object.")
+        unknown = set(spec) - SCENARIO_KEYS
+        if unknown:
+            raise ValueError(f"Scenario {i + 1}: unknown key(s) {', '.join(sorted(unknown))}.")
+        spec_weights = spec.get('weights') or {}
+        if not isinstance(spec_weights, dict) or set(spec_weights) - set(METRICS):
+            raise ValueError(f"Scenario {i + 1}: weights must map {', '.join(METRICS)} to numbers.")
+        try:
+            scenario = {
+                'name': str(spec.get('name') or f"Scenario {i + 1}"),
+                'weights': {metric: float(spec_weights.get(metric, base_weights[metric])) for metric in METRICS},
+                'tier_a_min': float(spec.get('tier_a_min', base_a)),
+                'tier_b_min': float(spec.get('tier_b_min', base_b)),
+                'tier_c_min': float(spec.get('tier_c_min', base_c)),
+                'min_events': int(spec.get('min_events', base_policy.min_events)),
+            }
+        except (TypeError, ValueError):
+            raise ValueError(f"Scenario {i + 1}: weights and thresholds must be numbers.")
+        if not all(0 <= weight <= MAX_WEIGHT for weight in scenario['weights'].values()):
+            raise ValueError(f"Scenario {i + 1}: weights must be between 0 and {MAX_WEIGHT}.")
+        if not scenario['tier_a_min'] > scenario['tier_b_min'] > scenario['tier_c_min']:
+            raise ValueError(f"Scenario {i + 1}: tier thresholds must decrease from A to C.")
+        if scenario['min_events'] < 1:
+            raise ValueError(f"Scenario {i + 1}: min_events must be at least 1.")
+
+        scenarios.append(scenario)
+        weights[i] = [scenario['weights'][metric] for metric in METRICS]
+        thresholds[i] = [scenario['tier_c_min'], scenario['tier_b_min'], scenario['tier_a_min']]
+        min_events[i] = scenario['min_events']
+    return scenarios, weights, thresholds, min_events
+
+def evaluate(matrix, weights, thresholds, min_events):
+    """
+    Scores every club under every scenario at once. Returns (cps, tiers,
+    ranks), each clubs x scenarios; tiers are indexes into TIER_LABELS and
+    rank 0 means unranked (Pending).
+    """
+    cps = matrix.averages @ weights.T
+    # Number of thresholds reached is the tier index: 0 = D ... 3 = A
+    tiers = np.zeros(cps.shape, dtype=np.int64)
+    for k in range(thresholds.shape[1]):
+        tiers += cps >= thresholds[:, k]
+    pending = matrix.counts[:, None] < min_events[None, :]
+    tiers[pending] = PENDING
+
+    # One unique integer key per club, (-CPS to the micro point, name order),
+    # so the plain sort orders ties like update_semester_ranks at half the
+    # cost of a stable float sort. Pending clubs sort last.
+    primary = np.where(pending, 1, -np.rint(cps * 1e6).astype(np.int64))
+    order = np.argsort(primary * len(matrix) + np.arange(len(matrix))[:, None], axis=0)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, len(matrix) + 1)[:, None], axis=0)
+    ranks[pending] = 0
+    return cps, tiers, ranks
+
+def simulate(semester, specs, top=10):
+    """
+    Evaluates what-if scenarios for a semester without writing anything.
+    Each result has the tier counts, the tier movements against the
+    semester's current policy, the number of clubs whose rank changed, the
+    `top` clubs of the simulated ranking and the `top` biggest rank moves.
+    """
+    base_policy = get_semester_policy(semester)
+    matrix = load_score_matrix(semester)
+    scenarios, weights, thresholds, min_events = parse_scenarios(specs, base_policy)
+
+    # Column 0 is the current policy, the baseline everything is compared to
+    base_c, base_b, base_a = base_policy.thresholds
+    weights = np.vstack([base_policy.weights, weights])
+    thresholds = np.vstack([[base_c, base_b, base_a], thresholds])
+    min_events = np.concatenate([[base_policy.min_events], min_events])
+    cps, tiers, ranks = evaluate(matrix, weights, thresholds, min_events)
+
+    # Scenario-major from here on, so each scenario is one contiguous row
+    cps, tiers, ranks = cps.T.copy(), tiers.T.copy(), ranks.T.copy()
+    base_tiers, base_ranks = tiers[0], ranks[0]
+    labels = len(TIER_LABELS)
+    scenario_offsets = np.arange(len(tiers))[:, None]
+    tier_counts = np.bincount((tiers + scenario_offsets * labels).ravel(), minlength=len(tiers) * labels)
+    tier_counts = tier_counts.reshape(len(tiers), labels)
+    transitions = np.bincount(
+        (base_tiers * labels + tiers + scenario_offsets * labels ** 2).ravel(), minlength=len(tiers) * labels ** 2
+    ).reshape(len(tiers), labels, labels)
+    tier_changes = (tiers != base_tiers).sum(axis=1)
+    rank_changes = (ranks != base_ranks).sum(axis=1)
+
+    results = []
+    for s, scenario in enumerate(scenarios, start=1):
+        rank_changed = np.flatnonzero(ranks[s] != base_ranks)
+        delta = np.where((ranks[s, rank_changed] > 0) & (base_ranks[rank_changed] > 0),
+                         base_ranks[rank_changed] - ranks[s, rank_changed], 0)
+        biggest = rank_changed[smallest(-np.abs(delta) * len(matrix) + rank_changed, top)]
+        leaders = np.flatnonzero((ranks[s] > 0) & (ranks[s] <= top))
+        leaders = leaders[np.argsort(ranks[s, leaders])]
+
+        results.append({
+            'scenario': scenario,
+            'tier_counts': {label: int(count) for label, count in zip(TIER_LABELS, tier_counts[s])},
+            'tier_changes': int(tier_changes[s]),
+            'tier_movements': {
+                f'{TIER_LABELS[before]}->{TIER_LABELS[after]}': int(transitions[s, before, after])
+                for before in range(labels) for after in range(labels)
+                if before != after and transitions[s, before, after]
+            },
+            'rank_changes': int(rank_changes[s]),
+            'top': [club_result(matrix, i, cps[s], tiers[s], ranks[s], base_tiers, base_ranks) for i in leaders],
+            'biggest_moves': [
+                club_result(matrix, i, cps[s], tiers[s], ranks[s], base_tiers, base_ranks) for i in biggest
+            ],
+        })
+    return {'semester': semester.pk, 'clubs': len(matrix), 'baseline_policy_version': base_policy.version, 'results': results}
+
+def smallest(keys, k):
+    """
+    Indexes of the `k` smallest (unique) keys in ascending order, without
+    sorting the whole array.
+    """
+    if k < len(keys):
+        candidates = np.argpartition(keys, k)[:k] if k else np.empty(0, dtype=np.int64)
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.argsort(keys[candidates])]
+
+def club_result(matrix, i, cps, tiers, ranks, base_tiers, base_ranks):
+    return {
+        'club_id': matrix.club_ids[i],
+        'short_code': matrix.short_codes[i],
+        'cps': round(float(cps[i]), 2),
+        'tier': TIER_LABELS[tiers[i]],
+        'rank': int(ranks[i]) or None,
+        'previous_tier': TIER_LABELS[base_tiers[i]],
+        'previous_rank': int(base_ranks[i]) or None,
+    }
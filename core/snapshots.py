@@ -0,0 +1,60 @@
+from .models import Club, Ranking, RankingSnapshot
+
+# A checkpoint is written instead of a delta once the deltas since the last
+# one would hold more club entries than this, which bounds every replay
+CHECKPOINT_CHANGES = 500
+
+def record_ranking_snapshot(semester, changes):
+    """
+    Appends the changes to a semester's standings, as returned by
+    update_club_history, to its snapshot log: as a delta, or as a checkpoint
+    of the whole table when there is none yet or the replay would get too
+    long. Must run in the transaction that re-ranked the semester, under its
+    lock, so snapshots are written in the order the changes were made.
+    """
+    if not changes:
+        return None
+    last = RankingSnapshot.objects.filter(semester=semester).order_by('-pk').values('changes_since_checkpoint').first()
+    if last is not None and last['changes_since_checkpoint'] + len(changes) <= CHECKPOINT_CHANGES:
+        return RankingSnapshot.objects.create(
+            semester=semester, rows=changes,
+            changes_since_checkpoint=last['changes_since_checkpoint'] + len(changes),
+        )
+    rows = {
+        club_id: [rank, tier, cps, event_count]
+        for club_id, rank, tier, cps, event_count in Ranking.objects.filter(semester=semester).values_list(
+            'club_id', 'rank', 'tier', 'cps', 'event_count'
+        )
+    }
+    return RankingSnapshot.objects.create(semester=semester, rows=rows, is_checkpoint=True)
+
+def rankings_as_of(semester, when):
+    """
+    A semester's ranking table as it stood at `when`, rebuilt from the
+    latest checkpoint at or before it plus the deltas up to it: a list of
+    dicts in dashboard order, or None when nothing was recorded that early.
+    """
+    snapshots = RankingSnapshot.objects.filter(semester=semester, recorded_at__lte=when)
+    checkpoint = snapshots.filter(is_checkpoint=True).order_by('-pk').values('pk', 'rows').first()
+    if checkpoint is None:
+        return None
+    table = checkpoint['rows']
+    for rows in snapshots.filter(pk__gt=checkpoint['pk']).order_by('pk').values_list('rows', flat=True):
+        table.update(rows)
+
+    table = {int(club_id): row for club_id, row in table.items() if row is not None}
+    if not table:
+        return []
+    clubs = Club.objects.filter(pk__in=table).values_list('pk', 'short_code', 'name')
+    names = {pk: (short_code, name) for pk, short_code, name in clubs}
+    result = [
+        {
+            'rank': rank, 'club_id': club_id,
+            'short_code': names.get(club_id, (None, None))[0], 'name': names.get(club_id, (None, None))[1],
+            'cps': cps, 'tier': tier, 'event_count': event_count,
+        }
+        for club_id, (rank, tier, cps, event_count) in table.items()
+    ]
+    # Pending clubs (no rank) last, as on the dashboard
+    result.sort(key=lambda row: (row['rank'] is None, row['rank'] or 0, -row['cps']))
+    return result
@@ -0,0 +1,41 @@
+import logging
+import time
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+@receiver(connection_created)
+def start_optimize_clock(sender, connection, **kwargs):
+    connection.optimized_at = time.monotonic()
+
+def optimize_if_due(connection):
+    """
+    Runs PRAGMA optimize on an open SQLite connection once it has been in
+    use for CTR_SQLITE_OPTIMIZE_INTERVAL seconds since connecting or the last
+    run. SQLite only re-analyzes the tables this connection's queries would
+    plan better with fresh statistics, so a new connection has nothing to do.
+    Returns whether it ran.
+    """
+    interval = settings.CTR_SQLITE_OPTIMIZE_INTERVAL
+    if not interval or connection.vendor != 'sqlite' or connection.connection is None or connection.in_atomic_block:
+        return False
+    if time.monotonic() - getattr(connection, 'optimized_at', 0) < interval:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize')
+    connection.optimized_at = time.monotonic()
+    return True
+
+@receiver(request_finished)
+def optimize_after_request(sender, **kwargs):
+    # After the response like the audit flush; connections that
+    # close_old_connections just closed are skipped
+    for connection in connections.all(initialized_only=True):
+        try:
+            optimize_if_due(connection)
+        except Exception:
+            logger.exception("PRAGMA optimize failed on %s", connection.alias)
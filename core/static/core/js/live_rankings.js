@@ -0,0 +1,86 @@
+// Keeps the dashboard's ranking table current without reloading: listens to
+// the semester's ranking stream and patches rank, tier, CPS and event count
+// in place. Clubs appearing or disappearing reload the (cached) page instead.
+document.addEventListener("DOMContentLoaded", function () {
+    const tbody = document.getElementById("rankings");
+    if (!tbody || !tbody.dataset.stream || !window.EventSource) {
+        return;
+    }
+
+    const TIERS = {
+        A: ["bg-success", "Tier A"],
+        B: ["bg-info text-dark", "Tier B"],
+        C: ["bg-warning text-dark", "Tier C"],
+        D: ["bg-danger", "Tier D"],
+    };
+
+    function badge(classes, text) {
+        const span = document.createElement("span");
+        span.className = "badge " + classes;
+        span.textContent = text;
+        return span;
+    }
+
+    function patchRow(row, values) {
+        const [rank, tier, cps, eventCount] = values;
+        const data = row.dataset;
+        if (data.rank === String(rank === null ? "" : rank) && data.tier === tier
+                && Number(data.cps) === cps && Number(data.events) === eventCount) {
+            return;
+        }
+        data.rank = rank === null ? "" : rank;
+        data.tier = tier;
+        data.cps = cps;
+        data.events = eventCount;
+        row.querySelector('[data-field="rank"]').replaceChildren(
+            rank === null ? badge("bg-secondary", "Pending") : badge("bg-primary rounded-pill", rank)
+        );
+        const [tierClasses, tierText] = TIERS[tier] || ["bg-secondary", "Pending"];
+        row.querySelector('[data-field="tier"]').replaceChildren(badge(tierClasses, tierText));
+        row.querySelector('[data-field="cps"]').textContent = cps.toFixed(2);
+        row.querySelector('[data-field="events"]').textContent = eventCount;
+
+        row.classList.add("table-warning");
+        setTimeout(function () { row.classList.remove("table-warning"); }, 2000);
+    }
+
+    function sortRows() {
+        // Same order as the server: by rank, Pending clubs last by CPS
+        const rows = Array.from(tbody.querySelectorAll("tr[data-club]"));
+        rows.sort(function (a, b) {
+            const rankA = a.dataset.rank === "" ? Infinity : Number(a.dataset.rank);
+            const rankB = b.dataset.rank === "" ? Infinity : Number(b.dataset.rank);
+            return rankA - rankB || Number(b.dataset.cps) - Number(a.dataset.cps);
+        });
+        tbody.append(...rows);
+    }
+
+    const source = new EventSource(tbody.dataset.stream);
+
+    source.addEventListener("rankings", function (event) {
+        const change = JSON.parse(event.data);
+        const seen = new Set();
+        for (const [clubId, values] of Object.entries(change.rows)) {
+            const row = tbody.querySelector('tr[data-club="' + clubId + '"]');
+            if (values === null && !row) {
+                continue;
+            }
+            if (values === null || !row) {
+                // A club joined or left the table
+                window.location.reload();
+                return;
+            }
+            patchRow(row, values);
+            seen.add(clubId);
+        }
+        if (change.checkpoint && seen.size !== tbody.querySelectorAll("tr[data-club]").length) {
+            window.location.reload();
+            return;
+        }
+        sortRows();
+    });
+
+    source.addEventListener("reload", function () {
+        window.location.reload();
+    });
+});
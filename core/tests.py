@@ -136,3 +136,1058 @@ def test_views(client):
     assert response.status_code == 200
 
 from django.contrib.auth.models import User
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+
+@pytest.fixture(autouse=True)
+def unbuffered_audit_log(settings):
+    # Write audit entries immediately unless a test opts into the buffer
+    settings.CTR_AUDIT_BUFFERED = False
+
+def make_event(club, semester, score, name="Event", date="2023-09-01"):
+    return Event.objects.create(
+        club=club, semester=semester, name=name, date=date,
+        expected_turnout=50, actual_turnout=50,
+        planning_score=score, execution_score=score, documentation_score=score,
+        innovation_score=score, turnout_score=score
+    )
+
+@pytest.mark.django_db
+def test_incremental_cps_matches_full_recalculation(settings):
+    from core.services import find_ranking_drift, rebuild_rankings
+    settings.CTR_INCREMENTAL_CPS = True
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    other = Semester.objects.create(name="Spring 2024")
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+
+    first = make_event(club, semester, 20)
+    make_event(club, semester, 16)
+    make_event(club, semester, 12)
+
+    # Edit a score, then move one event to another semester
+    first.planning_score = 8
+    first.save()
+    moved = Event.objects.get(name="Event", planning_score=12)
+    moved.semester = other
+    moved.save()
+
+    ranking = Ranking.objects.get(club=club, semester=semester)
+    assert ranking.event_count == 2
+    assert ranking.sum_planning == 24
+    assert ranking.avg_planning == 12.0
+    assert ranking.cps == 12.0 + 18.0 * 4
+    assert ranking.tier == 'B'
+    assert Ranking.objects.get(club=club, semester=other).event_count == 1
+    assert find_ranking_drift() == []
+
+    # Drift is reported and repaired by a rebuild
+    Ranking.objects.filter(pk=ranking.pk).update(sum_planning=0)
+    drift = find_ranking_drift(semester)
+    assert [(d[0], d[1]) for d in drift] == [(club.pk, semester.pk)]
+    rebuild_rankings([(club.pk, semester.pk)])
+    assert find_ranking_drift() == []
+
+@pytest.mark.django_db
+def test_update_semester_ranks_writes_only_changed_rows(django_assert_num_queries):
+    from core.services import update_semester_ranks
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    clubs = [
+        Club.objects.create(name=name, short_code=name[:4].upper(), faculty_incharge="F", student_lead="S")
+        for name in ["Zeta Club", "Alpha Club", "Music Club"]
+    ]
+    # Zeta and Alpha tie on CPS, Music is pending with a single event
+    for club in clubs[:2]:
+        make_event(club, semester, 15)
+        make_event(club, semester, 15)
+    make_event(clubs[2], semester, 20)
+
+    ranks = dict(Ranking.objects.filter(semester=semester).values_list('club__name', 'rank'))
+    assert ranks == {"Alpha Club": 1, "Zeta Club": 2, "Music Club": None}
+
+    # Nothing changed: the semester lock, the version bump and one SELECT, no
+    # Ranking UPDATE (plus the savepoint around them, as the test runs inside
+    # a transaction)
+    with django_assert_num_queries(5):
+        assert update_semester_ranks(semester) == {}
+
+@pytest.mark.django_db
+def test_defer_ranking_recalculates_once_per_pair(django_capture_on_commit_callbacks):
+    from core.models import AuditLog
+    from core.services import defer_ranking
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club_a = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    club_b = Club.objects.create(name="Robotics Club", short_code="BOT", faculty_incharge="F", student_lead="S")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with defer_ranking():
+            for score in [20, 16, 12]:
+                make_event(club_a, semester, score)
+                make_event(club_b, semester, score - 2)
+            # Nothing is recalculated until the batch is flushed
+            assert not Ranking.objects.exists()
+
+    assert AuditLog.objects.filter(action=AuditLog.Action.SEMESTER_CALCULATION).count() == 2
+    ranking_a = Ranking.objects.get(club=club_a, semester=semester)
+    ranking_b = Ranking.objects.get(club=club_b, semester=semester)
+    assert (ranking_a.cps, ranking_a.rank) == (80.0, 1)
+    assert (ranking_b.cps, ranking_b.rank) == (70.0, 2)
+
+@pytest.mark.django_db
+def test_import_events_command(tmp_path, django_capture_on_commit_callbacks):
+    import io
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+
+    header = "club,semester,name,date,expected_turnout,actual_turnout,planning_score,execution_score,documentation_score,innovation_score,turnout_score\n"
+    good = tmp_path / "events.csv"
+    good.write_text(header + "".join(
+        f"CODE,Fall 2023,Event {i},2023-09-0{i},50,40,{s},{s},{s},{s},{s}\n" for i, s in [(1, 20), (2, 16), (3, 12)]
+    ))
+    bad = tmp_path / "bad.jsonl"
+    bad.write_text('{"club": "CODE", "semester": "Fall 2023", "name": "Bad", "date": "2023-09-01", '
+                   '"expected_turnout": 1, "actual_turnout": 1, "planning_score": 25, "execution_score": 1, '
+                   '"documentation_score": 1, "innovation_score": 1, "turnout_score": 1}\n')
+
+    with pytest.raises(CommandError):
+        call_command("import_events", str(bad))
+    # A malformed line is an invalid row too, named by its line number
+    malformed = tmp_path / "malformed.jsonl"
+    malformed.write_text(bad.read_text() + '\n{"club": "CODE",\n')
+    stderr = io.StringIO()
+    with pytest.raises(CommandError, match="2 invalid row"):
+        call_command("import_events", str(malformed), "--dry-run", stderr=stderr)
+    assert "Row 2: Invalid JSON on line 3:" in stderr.getvalue()
+    call_command("import_events", str(good), "--dry-run")
+    assert not Event.objects.exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("import_events", str(good), "--chunk-size", "2")
+
+    assert Event.objects.count() == 3
+    ranking = Ranking.objects.get(club=club, semester=semester)
+    assert (ranking.event_count, ranking.cps, ranking.rank) == (3, 80.0, 1)
+
+@pytest.mark.django_db
+def test_dashboard_and_export_query_count_is_constant(client, django_capture_on_commit_callbacks):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    client.force_login(user)
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+
+    def query_counts():
+        counts = []
+        for url in [reverse('dashboard'), f"{reverse('export_rankings')}?semester={semester.pk}"]:
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+                assert response.status_code == 200
+                # Streaming responses only query as they are consumed
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            counts.append(len(ctx))
+        return counts
+
+    def add_clubs(start, count):
+        # Committing bumps the ranking version, so the dashboard isn't served from cache
+        with django_capture_on_commit_callbacks(execute=True):
+            for i in range(start, start + count):
+                club = Club.objects.create(name=f"Club {i}", short_code=f"C{i}", faculty_incharge="F", student_lead="S")
+                make_event(club, semester, 10 + i % 10)
+
+    add_clubs(0, 2)
+    small = query_counts()
+    add_clubs(2, 20)
+    assert query_counts() == small
+    # Session, user, semesters, rankings and the live stream's starting snapshot
+    assert small[0] <= 5
+
+@pytest.mark.django_db
+def test_export_events_csv_streams_all_semesters(client):
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    client.force_login(user)
+    fall = Semester.objects.create(name="Fall 2023")
+    spring = Semester.objects.create(name="Spring 2024", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, fall, 20, name="Hackathon")
+    make_event(club, spring, 10, name="Workshop")
+
+    response = client.get(reverse('export_events'))
+    assert response.streaming
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert lines[0].startswith('Semester,Club Code,Club,Event')
+    assert lines[1:] == [
+        'Fall 2023,CODE,Coding Club,Hackathon,2023-09-01,50,50,20,20,20,20,20,100',
+        'Spring 2024,CODE,Coding Club,Workshop,2023-09-01,50,50,10,10,10,10,10,50',
+    ]
+
+    response = client.get(reverse('export_events'), {'semester': spring.pk})
+    assert len(b''.join(response.streaming_content).decode().splitlines()) == 2
+
+@pytest.mark.django_db
+def test_dashboard_is_cached_until_rankings_change(client, django_assert_max_num_queries, django_capture_on_commit_callbacks):
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    client.force_login(user)
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 20)
+
+    response = client.get(reverse('dashboard'))
+    etag = response['ETag']
+    assert b"Coding Club" in response.content
+    assert client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # A cached render doesn't query the rankings again (session, user, semesters)
+    with django_assert_max_num_queries(3):
+        assert b"Coding Club" in client.get(reverse('dashboard')).content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        make_event(club, semester, 10)
+    response = client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert b"75.00" in response.content
+
+@pytest.mark.django_db(transaction=True)
+def test_ranking_version_lives_in_the_database(client):
+    from django.core.cache import cache
+    from django.db import transaction
+    from core.caching import get_ranking_version
+
+    user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    client.force_login(user)
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 20)
+    stale = Semester.objects.get(pk=semester.pk)
+    version = get_ranking_version(semester.pk)
+    etag = client.get(reverse('dashboard'))['ETag']
+
+    # Bumped with the change: a rolled back save leaves it alone
+    with pytest.raises(RuntimeError), transaction.atomic():
+        make_event(club, semester, 10)
+        raise RuntimeError
+    assert get_ranking_version(semester.pk) == version
+
+    # A process whose cache never heard of a save still sees it, because the
+    # version it keys the cached table by comes from the database
+    cached = dict(cache._cache)
+    make_event(club, semester, 10)
+    assert get_ranking_version(semester.pk) > version
+    cache._cache.update(cached)
+    response = client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert b"75.00" in response.content
+
+    # Saving a semester loaded before the bump doesn't move the version back
+    stale.name = "Fall 2023 (main)"
+    stale.save()
+    assert get_ranking_version(semester.pk) > version
+
+@pytest.mark.django_db
+def test_audit_log_entries_are_buffered_and_flushed(settings, django_capture_on_commit_callbacks):
+    from core.audit import AuditBuffer, audit_buffer
+    from core.models import AuditLog
+    settings.CTR_AUDIT_BUFFERED = True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    assert not AuditLog.objects.exists()
+    assert audit_buffer.flush() == 1
+    assert AuditLog.objects.get().action == AuditLog.Action.CLUB_ADDED
+
+    # A full queue makes the producer flush (backpressure)
+    buffer = AuditBuffer(batch_size=10, max_size=3, flush_interval=60)
+    for i in range(3):
+        buffer.add(AuditLog(action=AuditLog.Action.OTHER, details=str(i)))
+    assert len(buffer) == 0
+    assert list(AuditLog.objects.filter(action=AuditLog.Action.OTHER).values_list('details', flat=True)) == ['0', '1', '2']
+
+@pytest.mark.django_db
+def test_audit_log_is_structured_and_archivable(tmp_path):
+    import gzip
+    import json
+    from datetime import timedelta
+    from django.core.management import call_command
+    from django.utils import timezone
+    from core.models import AuditLog
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    event = make_event(club, semester, 10)
+    event.planning_score = 15
+    event.save()
+
+    entry = AuditLog.objects.get(action=AuditLog.Action.EVENT_UPDATED)
+    assert entry.target == event
+    assert entry.club == club
+    assert entry.data['changes'] == {'planning_score': [10, 15]}
+    assert entry.details.endswith("Changes: planning_score: 10 -> 15")
+    assert AuditLog.objects.filter(club=club).count() == 5
+
+    AuditLog.objects.exclude(pk=entry.pk).update(timestamp=timezone.now() - timedelta(days=400))
+    call_command("archive_audit_logs", "--days", "365", "--output-dir", str(tmp_path), "--batch-size", "2")
+
+    assert list(AuditLog.objects.all()) == [entry]
+    [archive] = tmp_path.iterdir()
+    with gzip.open(archive, 'rt') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row['action'] for row in rows] == ['club_added', 'event_added', 'semester_calculation', 'semester_calculation']
+    assert rows[1]['content_type__model'] == 'event'
+
+@pytest.mark.django_db
+def test_audit_diff_uses_loaded_snapshot_without_query():
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from core.models import AuditLog
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 10)
+
+    # Scores are diffed against the stored row; a save that writes none of
+    # them, or the club and semester, trusts the snapshot instead
+    event = Event.objects.get()
+    event.execution_score = 12
+    event.save()
+    event.execution_score = 14
+    event.save()
+    event.name = "Renamed"
+    with CaptureQueriesContext(connection) as ctx:
+        event.save(update_fields=['name'])
+    assert not [q for q in ctx.captured_queries if 'FROM "core_event"' in q['sql']]
+    details = list(AuditLog.objects.filter(action=AuditLog.Action.EVENT_UPDATED).order_by('pk').values_list('details', flat=True))
+    assert details == [
+        "Event: Event (CODE). Score: 52. Changes: execution_score: 10 -> 12",
+        "Event: Event (CODE). Score: 54. Changes: execution_score: 12 -> 14",
+        "Event: Renamed (CODE). Score: 54",
+    ]
+
+    # Reading a deferred field reloads only that field: the unsaved score
+    # edit still diffs against the loaded value
+    from core.services import find_ranking_drift
+    event = Event.objects.defer('name').get()
+    event.planning_score = 20
+    assert event.name == "Renamed"
+    event.save()
+    assert AuditLog.objects.filter(action=AuditLog.Action.EVENT_UPDATED).latest('pk').details == (
+        "Event: Renamed (CODE). Score: 64. Changes: planning_score: 10 -> 20"
+    )
+    assert find_ranking_drift() == []
+
+    club.student_lead = "Dana"
+    club.save()
+    assert AuditLog.objects.filter(action=AuditLog.Action.CLUB_UPDATED).get().details == (
+        "Club: Coding Club details updated. Changes: student_lead: S -> Dana"
+    )
+
+@pytest.mark.django_db
+def test_save_from_stale_instance_diffs_against_stored_row():
+    from core.models import AuditLog
+    from core.services import find_ranking_drift
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 10)
+    make_event(club, semester, 10)
+
+    # Two admins open the same event; the second saves over the first's edit
+    pk = Event.objects.first().pk
+    a, b = Event.objects.get(pk=pk), Event.objects.get(pk=pk)
+    a.planning_score = 15
+    a.save()
+    b.planning_score = 12
+    b.save()
+
+    assert find_ranking_drift() == []
+    assert Ranking.objects.get().sum_planning == 22
+    assert AuditLog.objects.filter(action=AuditLog.Action.EVENT_UPDATED).latest('pk').details == (
+        "Event: Event (CODE). Score: 52. Changes: planning_score: 15 -> 12"
+    )
+
+@pytest.mark.django_db
+def test_save_with_update_fields_only_applies_written_fields():
+    from core.models import AuditLog
+    from core.services import find_ranking_drift
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    other = Club.objects.create(name="Robotics Club", short_code="BOT", faculty_incharge="F", student_lead="S")
+    event = make_event(club, semester, 10)
+    make_event(club, semester, 10)
+
+    def last_update():
+        return AuditLog.objects.filter(action=AuditLog.Action.EVENT_UPDATED).latest('pk').details
+
+    # Neither the unsaved score nor the unsaved club reach the rankings or the log
+    event.planning_score = 0
+    event.club = other
+    event.name = "Renamed"
+    event.save(update_fields=['name'])
+    assert last_update() == "Event: Renamed (CODE). Score: 50"
+    assert find_ranking_drift() == []
+    assert Ranking.objects.get(club=club, semester=semester).cps == 50.0
+
+    # They are still pending, and a full save writes and logs them
+    event.save()
+    assert last_update() == "Event: Renamed (BOT). Score: 40. Changes: planning_score: 10 -> 0"
+    assert find_ranking_drift() == []
+    assert Ranking.objects.get(club=other, semester=semester).event_count == 1
+
+@pytest.mark.django_db
+def test_seed_benchmark_is_deterministic():
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+
+    def scores(prefix):
+        return list(
+            Event.objects.filter(club__name__startswith=prefix).order_by('club__name', 'semester__name', 'name')
+            .values_list('planning_score', 'turnout_score')
+        )
+
+    call_command("seed_benchmark", "--clubs", "3", "--semesters", "2", "--events-per-club", "2", "--seed", "7", "--prefix", "One")
+    call_command("seed_benchmark", "--clubs", "3", "--semesters", "2", "--events-per-club", "2", "--seed", "7", "--prefix", "Two")
+    assert Event.objects.count() == 24
+    assert Ranking.objects.count() == 12
+    assert scores("One") == scores("Two")
+
+    with pytest.raises(CommandError):
+        call_command("seed_benchmark", "--clubs", "1", "--prefix", "One")
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_views_and_handlers(client, settings):
+    from core.metrics import registry
+    registry.reset()
+    settings.CTR_METRICS_TOKEN = "scrape-secret"
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 10)
+
+    assert client.get(reverse('metrics')).status_code == 403
+    user = User.objects.create_user('member', 'member@example.com', 'password')
+    client.force_login(user)
+    assert client.get(reverse('dashboard')).status_code == 200
+    assert client.get(reverse('metrics')).status_code == 403
+
+    client.logout()
+    response = client.get(reverse('metrics'), HTTP_AUTHORIZATION="Bearer scrape-secret")
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'ctr_request_duration_seconds_count{view="dashboard",method="GET"} 1' in body
+    assert 'ctr_request_db_queries_bucket{view="dashboard",le="+Inf"} 1' in body
+    assert 'ctr_signal_handler_duration_seconds_count{handler="event_save_handler"} 1' in body
+    assert 'ctr_recent_request_duration_seconds{view="dashboard",quantile="0.99"}' in body
+
+    staff = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+    client.force_login(staff)
+    assert client.get(reverse('metrics')).status_code == 200
+
+@pytest.mark.django_db
+def test_metrics_count_queries_of_async_views(async_client):
+    import re
+    from asgiref.sync import async_to_sync
+    from core.metrics import registry
+    registry.reset()
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 10)
+    async_client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+
+    # The views run their queries in sync_to_async threads, on those threads' connections
+    response = async_to_sync(async_client.get)(reverse('dashboard'))
+    assert response.status_code == 200
+    queries = re.search(r'ctr_request_db_queries_sum\{view="dashboard"\} (\d+)', registry.render())
+    assert int(queries.group(1)) > 0
+
+@pytest.mark.django_db
+def test_recompute_rankings_command(django_assert_max_num_queries):
+    import io
+    from django.core.management import call_command
+    from core.services import recompute_semester
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    spring = Semester.objects.create(name="Spring 2024")
+    club_a = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    club_b = Club.objects.create(name="Robotics Club", short_code="BOT", faculty_incharge="F", student_lead="S")
+    for score in (18, 18):
+        make_event(club_a, semester, score)
+    for score in (16, 16):
+        make_event(club_b, semester, score)
+    make_event(club_b, spring, 10)
+
+    # Data fixed directly in SQL: the rankings no longer match the events
+    Event.objects.filter(club=club_b, semester=semester).update(planning_score=20, execution_score=20, documentation_score=20, innovation_score=20, turnout_score=20)
+    Ranking.objects.filter(club=club_a, semester=spring).delete()
+    Ranking.objects.create(club=club_a, semester=spring, event_count=3, cps=50, tier='D', rank=1)
+
+    out = io.StringIO()
+    call_command("recompute_rankings", "--semester", str(semester.pk), stdout=out)
+    assert "BOT: tier B, rank 2 -> tier A, rank 1" in out.getvalue()
+    assert "CODE: tier A, rank 1 -> tier A, rank 2" in out.getvalue()
+    assert Ranking.objects.get(club=club_b, semester=semester).cps == 100.0
+
+    out = io.StringIO()
+    call_command("recompute_rankings", "--all", "--workers", "2", stdout=out)
+    assert "CODE: tier D, rank 1 -> no ranking" in out.getvalue()
+    assert not Ranking.objects.filter(club=club_a, semester=spring).exists()
+
+    # Nothing left to change: one aggregate, one read, one re-rank read, the
+    # version bump and the audit entry, plus a semester lock and a savepoint
+    # for each of the recompute and the re-rank
+    with django_assert_max_num_queries(12):
+        assert recompute_semester(semester) == []
+
+@pytest.mark.django_db
+def test_scoring_policy_rescores_only_its_semesters(django_capture_on_commit_callbacks):
+    from core.models import ScoringPolicy
+    from core.scoring import DEFAULT_POLICY, get_policy
+    from core.services import get_tier
+
+    assert [get_tier(cps, 2) for cps in (95, 90, 89.9, 75, 60, 59.9)] == ['A', 'A', 'B', 'B', 'C', 'D']
+    assert get_tier(100, 1) == 'P'
+
+    fall = Semester.objects.create(name="Fall 2023", is_active=True)
+    spring = Semester.objects.create(name="Spring 2024")
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    other = Club.objects.create(name="Robotics Club", short_code="BOT", faculty_incharge="F", student_lead="S")
+    for semester in (fall, spring):
+        make_event(club, semester, 16)
+        make_event(club, semester, 16)
+        make_event(other, semester, 13)
+        make_event(other, semester, 13)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        policy = ScoringPolicy.objects.create(name="Strict", tier_a_min=95, tier_b_min=85, tier_c_min=70)
+        fall.scoring_policy = policy
+        fall.save()
+    assert get_policy(policy.pk).thresholds == (70, 85, 95)
+    assert Ranking.objects.get(club=club, semester=fall).tier == 'C'
+    assert Ranking.objects.get(club=club, semester=spring).tier == 'B'
+
+    # Weighting turnout double lifts both clubs in the policy's semester only
+    with django_capture_on_commit_callbacks(execute=True):
+        policy.turnout_weight = 2.0
+        policy.min_events = 3
+        policy.save()
+    assert policy.version == 2
+    assert get_policy(policy.pk).version == 2
+    fall_ranking = Ranking.objects.get(club=club, semester=fall)
+    assert (fall_ranking.cps, fall_ranking.tier) == (96.0, 'P')
+    spring_ranking = Ranking.objects.get(club=club, semester=spring)
+    assert (spring_ranking.cps, spring_ranking.tier) == (80.0, 'B')
+
+    # Saved by another process, whose signals this one never sees: the next
+    # calculation here still scores with the new weights
+    from django.db.models import F
+    from django.utils import timezone
+    from core.services import calculate_club_performance
+    ScoringPolicy.objects.filter(pk=policy.pk).update(turnout_weight=3.0, version=F('version') + 1, updated_at=timezone.now())
+    assert calculate_club_performance(club, fall).cps == 112.0
+    assert get_policy(policy.pk).version == 3
+
+    with django_capture_on_commit_callbacks(execute=True):
+        policy.delete()
+    assert get_policy(policy.pk) is DEFAULT_POLICY
+    fall_ranking.refresh_from_db()
+    assert (fall_ranking.cps, fall_ranking.tier, fall_ranking.rank) == (80.0, 'B', 1)
+
+@pytest.mark.django_db
+def test_simulation_matches_stored_rankings_and_writes_nothing(client):
+    import json
+    import io
+    from django.core.management import call_command
+    from core.simulation import simulate
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    clubs = [
+        Club.objects.create(name=f"Club {code}", short_code=code, faculty_incharge="F", student_lead="S")
+        for code in ("AAA", "BBB", "CCC")
+    ]
+    for club, score in zip(clubs, (17, 16, 12)):
+        make_event(club, semester, score)
+        make_event(club, semester, score)
+    stored = list(Ranking.objects.filter(semester=semester).order_by('club__name').values_list('tier', 'rank', 'cps'))
+
+    scenario = {"weights": {"turnout": 2}, "tier_a_min": 100, "tier_c_min": 74}
+    result = simulate(semester, [{"name": "Same"}, scenario])
+    same, turnout = result['results']
+    assert same['tier_changes'] == 0 and same['rank_changes'] == 0
+    assert [(c['tier'], c['rank'], c['cps']) for c in same['top']] == [
+        (tier, rank, round(cps, 2)) for tier, rank, cps in sorted(stored, key=lambda row: row[1])
+    ]
+    # AAA: 85 + 17 = 102 -> A, BBB: 80 + 16 = 96 -> B, CCC: 60 + 12 = 72 -> D
+    assert turnout['tier_movements'] == {'B->A': 1, 'C->D': 1}
+    assert [(c['short_code'], c['tier'], c['cps']) for c in turnout['top']] == [
+        ("AAA", 'A', 102.0), ("BBB", 'B', 96.0), ("CCC", 'D', 72.0)
+    ]
+    assert list(Ranking.objects.filter(semester=semester).order_by('club__name').values_list('tier', 'rank', 'cps')) == stored
+
+    url = reverse('simulate_rankings', args=[semester.pk])
+    payload = json.dumps({"scenarios": [{"tier_a_min": 50, "tier_b_min": 60}]})
+    client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+    assert client.post(url, payload, content_type="application/json").status_code == 302
+    client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+    response = client.post(url, payload, content_type="application/json")
+    assert response.status_code == 400
+    assert "decrease" in response.json()['error']
+    response = client.post(url, json.dumps({"scenarios": [{"min_events": 3}]}), content_type="application/json")
+    assert response.json()['results'][0]['tier_counts'] == {'D': 0, 'C': 0, 'B': 0, 'A': 0, 'P': 3}
+
+    out = io.StringIO()
+    call_command("simulate_rankings", "--semester", str(semester.pk), "--scenario", json.dumps(scenario), stdout=out)
+    assert "2 tier change(s) (C->D x1, B->A x1), 0 rank change(s)" in out.getvalue()
+
+@pytest.mark.django_db
+def test_club_history_tracks_trends_incrementally(client, django_assert_num_queries):
+    from core.models import ClubHistory
+
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    rival = Club.objects.create(name="Art Club", short_code="ART", faculty_incharge="F", student_lead="S")
+    semesters = [Semester.objects.create(name=f"Term {i}") for i in range(4)]
+    events = {}
+    # CPS 70 (C), 80 (B), 80 (B), 50 (D)
+    for semester, score in zip(semesters, (14, 16, 16, 10)):
+        events[semester.pk] = make_event(club, semester, score)
+        make_event(club, semester, score)
+        make_event(rival, semester, 15)
+        make_event(rival, semester, 15)
+
+    def history():
+        return list(ClubHistory.objects.filter(club=club).order_by('semester_id').values_list(
+            'cps', 'tier', 'rank', 'cps_change', 'tier_change', 'cps_moving_avg', 'tier_streak'
+        ))
+
+    assert history() == [
+        (70.0, 'C', 2, None, None, 70.0, 1),
+        (80.0, 'B', 1, 10.0, 1, 75.0, 1),
+        (80.0, 'B', 1, 0.0, 0, pytest.approx(76.67, abs=0.01), 2),
+        (50.0, 'D', 2, -30.0, -1, pytest.approx(70.0), 1),
+    ]
+
+    # Raising an earlier semester updates the trend columns of the later ones
+    event = events[semesters[0].pk]
+    event.planning_score = event.execution_score = event.documentation_score = 18
+    event.innovation_score = event.turnout_score = 18
+    event.save()
+    rows = history()
+    assert rows[0][:3] == (80.0, 'B', 1)
+    assert rows[1][3:5] == (0.0, 0)
+    assert rows[2][6] == 3
+
+    # A semester whose ranking disappears drops out of the history
+    Event.objects.filter(club=club, semester=semesters[3]).delete()
+    assert len(history()) == 3
+
+    client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+    with django_assert_num_queries(4):
+        response = client.get(reverse('club_history', args=[club.pk]))
+    assert response.status_code == 200
+    assert "Term 2" in response.content.decode()
+    for i in range(4, 8):
+        semester = Semester.objects.create(name=f"Term {i}")
+        make_event(club, semester, 12)
+        make_event(club, semester, 12)
+    # Session, user, club and the history rows, however many semesters there are
+    with django_assert_num_queries(4):
+        assert client.get(reverse('club_history', args=[club.pk])).status_code == 200
+
+@pytest.mark.django_db
+def test_club_events_keyset_pagination_and_admin_total(client):
+    from core.services import defer_ranking
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    with defer_ranking():
+        # Pairs of events share a date, so the id breaks ties
+        for i in range(30):
+            make_event(club, semester, i % 21, name=f"Event {i}", date=f"2023-09-{i // 2 + 1:02d}")
+    expected = list(Event.objects.filter(club=club).order_by('date', 'id').values_list('id', flat=True))
+
+    client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+    url = reverse('club_events_json', args=[club.pk])
+    seen = []
+    params = {'semester': semester.pk, 'limit': 12}
+    while True:
+        data = client.get(url, params).json()
+        seen += [event['id'] for event in data['events']]
+        if not data['next']:
+            break
+        params['after'] = data['next']
+    assert seen == expected
+    assert data['events'][-1]['total_score'] == 5 * (29 % 21)
+
+    # Walking back from the last page
+    back = client.get(url, {'semester': semester.pk, 'limit': 12, 'before': data['previous']}).json()
+    assert [event['id'] for event in back['events']] == expected[12:24]
+    assert client.get(url, {'semester': semester.pk, 'after': 'nonsense'}).status_code == 400
+
+    response = client.get(reverse('club_detail', args=[club.pk]), {'semester': semester.pk})
+    assert [event.pk for event in response.context['events']] == expected[:25]
+    assert response.context['previous_cursor'] is None
+    assert f"after={response.context['next_cursor']}" in response.content.decode()
+
+    # Admin sorts and filters on the SQL total
+    changelist = reverse('admin:core_event_changelist')
+    response = client.get(changelist, {'o': '-5', 'total': '90'})
+    assert [event.total for event in response.context['cl'].result_list] == [100, 95, 90]
+
+@pytest.mark.django_db
+def test_json_api_fields_compact_and_conditional_get(client, settings, django_assert_num_queries, django_capture_on_commit_callbacks):
+    settings.CTR_API_TOKEN = 'portal-token'
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    clubs = [
+        Club.objects.create(name=f"Club {i}", short_code=f"C{i}", faculty_incharge="F", student_lead="S")
+        for i in range(3)
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        for i, club in enumerate(clubs):
+            make_event(club, semester, 10 + i)
+            event = make_event(club, semester, 10 + i)
+
+    url = reverse('api_semester_rankings', args=[semester.pk])
+    assert client.get(url).status_code == 401
+    auth = {'HTTP_AUTHORIZATION': 'Bearer portal-token'}
+    response = client.get(url, {'fields': 'short_code,cps,rank'}, **auth)
+    assert response.status_code == 200
+    assert response.json()['results'][0] == {'short_code': 'C2', 'cps': 60.0, 'rank': 1}
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    compact = client.get(url, {'fields': 'short_code,tier', 'format': 'compact'}, **auth).json()
+    assert compact['fields'] == ['short_code', 'tier']
+    assert compact['rows'] == [['C2', 'C'], ['C1', 'D'], ['C0', 'D']]
+    assert client.get(url, {'fields': 'short_code,password'}, **auth).status_code == 400
+    assert client.get(reverse('api_semester_rankings', args=[999]), **auth).status_code == 404
+
+    # Polling with the ETag is a 304 after a single query, for the version
+    etag = response.headers['ETag']
+    with django_assert_num_queries(1):
+        polled = client.get(url, {'fields': 'short_code,cps,rank'}, HTTP_IF_NONE_MATCH=etag, **auth)
+    assert polled.status_code == 304
+    # ...until the rankings change, even from an edit that leaves the scores alone
+    with django_capture_on_commit_callbacks(execute=True):
+        event.name = "Renamed"
+        event.save()
+    assert client.get(url, {'fields': 'short_code,cps,rank'}, HTTP_IF_NONE_MATCH=etag, **auth).status_code == 200
+
+    assert client.get(url, HTTP_ACCEPT_ENCODING='gzip', **auth).headers['Content-Encoding'] == 'gzip'
+    events_url = reverse('api_club_events', args=[clubs[2].pk])
+    response = client.get(events_url, {'fields': 'name,total_score'}, **auth)
+    assert response.json()['results'] == [{'name': "Event", 'total_score': 60}, {'name': "Renamed", 'total_score': 60}]
+    assert client.get(
+        events_url, {'fields': 'name,total_score'}, HTTP_IF_NONE_MATCH=response.headers['ETag'], **auth
+    ).status_code == 304
+
+    client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+    # Both event endpoints serve the same pages
+    page = client.get(events_url, {'limit': 1}).json()
+    assert client.get(reverse('club_events_json', args=[clubs[2].pk]), {'limit': 1}).json() == {
+        'club': page['club'], 'semester': page['semester'], 'events': page['results'],
+        'previous': page['previous'], 'next': page['next'],
+    }
+    assert page['next'] and len(page['results']) == 1
+    assert client.get(events_url, {'limit': 'x'}).status_code == 400
+    detail = client.get(reverse('api_club_detail', args=[clubs[0].pk]), {'format': 'compact', 'fields': 'semester,tier,rank'})
+    assert detail.json()['club']['short_code'] == 'C0'
+    assert detail.json()['rows'] == [["Fall 2023", 'D', 3]]
+    assert client.get(reverse('api_semesters')).json()['results'] == [{'id': semester.pk, 'name': "Fall 2023", 'is_active': True}]
+
+@pytest.mark.django_db
+def test_async_views_and_current_user_under_asgi(async_client, rf):
+    import asyncio
+    from asgiref.sync import async_to_sync
+    from core.middleware import CurrentUserMiddleware, get_current_user
+
+    # Concurrent requests on one event loop each see their own user
+    async def view(request):
+        await asyncio.sleep(0)
+        return get_current_user()
+
+    middleware = CurrentUserMiddleware(view)
+    requests = [rf.get('/'), rf.get('/')]
+    requests[0].user, requests[1].user = "alice", "bob"
+
+    async def both():
+        return await asyncio.gather(*(middleware(request) for request in requests))
+    assert async_to_sync(both)() == ["alice", "bob"]
+    assert get_current_user() is None
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    club = Club.objects.create(name="Coding Club", short_code="CODE", faculty_incharge="F", student_lead="S")
+    make_event(club, semester, 20)
+    make_event(club, semester, 10)
+
+    async def fetch():
+        dashboard, detail, export = await asyncio.gather(
+            async_client.get(reverse('dashboard')),
+            async_client.get(reverse('club_detail', args=[club.pk])),
+            async_client.get(reverse('export_events')),
+        )
+        body = b''.join([chunk async for chunk in export.streaming_content]) if export.streaming else None
+        return dashboard, detail, export, body
+
+    dashboard, detail, export, body = async_to_sync(fetch)()
+    assert dashboard.status_code == 302
+    assert export.status_code == 302
+
+    async_client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+    dashboard, detail, export, body = async_to_sync(fetch)()
+    assert b"Coding Club" in dashboard.content
+    assert dashboard['ETag']
+    assert [event.total for event in detail.context['events']] == [100, 50]
+    assert body.decode().splitlines()[1:] == [
+        'Fall 2023,CODE,Coding Club,Event,2023-09-01,50,50,20,20,20,20,20,100',
+        'Fall 2023,CODE,Coding Club,Event,2023-09-01,50,50,10,10,10,10,10,50',
+    ]
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_event_saves_keep_ranks_consistent():
+    import random
+    import threading
+    from django.db import connections
+    from core.services import find_ranking_drift
+
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    other = Semester.objects.create(name="Spring 2024")
+    clubs = [
+        Club.objects.create(name=f"Club {i}", short_code=f"C{i}", faculty_incharge="F", student_lead="S")
+        for i in range(6)
+    ]
+    # Events every admin edits, so saves of one event race each other
+    shared = [make_event(clubs[i], semester, 10, name=f"Shared {i}").pk for i in range(3)]
+    errors = []
+
+    def admin(n):
+        # Each thread plays an admin in its own gunicorn worker: create, edit,
+        # delete, and edit or move one of the shared events
+        rng = random.Random(n)
+        try:
+            for i in range(8):
+                event = make_event(rng.choice(clubs), rng.choice([semester, semester, other]), rng.randint(0, 20), name=f"E{n}-{i}")
+                event.planning_score = rng.randint(0, 20)
+                event.save()
+                if i % 3 == 0:
+                    event.delete()
+                event = Event.objects.get(pk=rng.choice(shared))
+                event.execution_score = rng.randint(0, 20)
+                if i % 4 == 0:
+                    event.club, event.semester = rng.choice(clubs), rng.choice([semester, other])
+                event.save()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=admin, args=(n,)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert find_ranking_drift() == []
+    for s in (semester, other):
+        rankings = list(Ranking.objects.filter(semester=s).select_related('club'))
+        ranked = sorted((r for r in rankings if r.tier != 'P'), key=lambda r: (-r.cps, r.club.name))
+        assert [r.rank for r in ranked] == list(range(1, len(ranked) + 1))
+        assert all(r.rank is None for r in rankings if r.tier == 'P')
+
+@pytest.mark.django_db
+def test_ranking_queue_defers_recalculation_to_worker(client, settings, django_assert_num_queries, django_capture_on_commit_callbacks):
+    import io
+    from django.core.management import call_command
+    from core.jobs import claim_ranking_jobs, enqueue_ranking_jobs
+    from core.models import RankingJob
+    from core.services import find_ranking_drift, run_ranking_jobs
+
+    settings.CTR_RANKING_QUEUE = True
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    clubs = [
+        Club.objects.create(name=f"Club {i}", short_code=f"C{i}", faculty_incharge="F", student_lead="S")
+        for i in range(3)
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        events = [make_event(club, semester, 5 + 5 * i) for i, club in enumerate(clubs) for _ in range(2)]
+
+    # A save is the lock and read of the stored scores, the event write, its
+    # audit entry and one job upsert (in a savepoint here, since the test
+    # runs in a transaction), however big the semester
+    event = events[0]
+    event.planning_score = 20
+    with django_assert_num_queries(7):
+        event.save()
+    assert not Ranking.objects.exists()
+    assert RankingJob.objects.count() == 3
+
+    client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+    response = client.get(reverse('dashboard'))
+    assert b"Refresh pending" in response.content
+    assert client.get(reverse('api_semester_rankings', args=[semester.pk])).json()['pending'] is True
+
+    # The worker is another process: only what it commits reaches the web workers
+    call_command('run_ranking_worker', '--once', stdout=io.StringIO())
+    assert client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
+    assert not RankingJob.objects.exists()
+    assert find_ranking_drift(semester) == []
+    assert list(Ranking.objects.filter(semester=semester).order_by('rank').values_list('club__name', 'rank')) == [
+        ("Club 2", 1), ("Club 1", 2), ("Club 0", 3),
+    ]
+    assert b"Refresh pending" not in client.get(reverse('dashboard')).content
+    assert client.get(reverse('api_semester_rankings', args=[semester.pk])).json()['pending'] is False
+
+    # A job requested again while a worker runs it stays queued for the next run
+    enqueue_ranking_jobs({(clubs[0].pk, semester.pk)})
+    jobs = claim_ranking_jobs()
+    assert claim_ranking_jobs() == []
+    enqueue_ranking_jobs({(clubs[0].pk, semester.pk)})
+    assert run_ranking_jobs(jobs) == 0
+    job = RankingJob.objects.get()
+    assert (job.club_id, job.claimed_by, job.claimed_at) == (clubs[0].pk, '', None)
+
+@pytest.mark.django_db
+def test_rankings_as_of_replays_snapshots_from_checkpoints(client, monkeypatch, django_assert_num_queries, django_capture_on_commit_callbacks):
+    from django.utils import timezone
+    from core.models import RankingSnapshot
+    from core.snapshots import rankings_as_of
+
+    monkeypatch.setattr('core.snapshots.CHECKPOINT_CHANGES', 4)
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    clubs = [
+        Club.objects.create(name=f"Club {i}", short_code=f"C{i}", faculty_incharge="F", student_lead="S")
+        for i in range(4)
+    ]
+
+    def standings():
+        return {
+            r.club_id: (r.rank, r.tier, r.cps, r.event_count)
+            for r in Ranking.objects.filter(semester=semester)
+        }
+
+    before = timezone.now()
+    history = []
+    with django_capture_on_commit_callbacks(execute=True):
+        events = []
+        for i, club in enumerate(clubs):
+            events += [make_event(club, semester, 4 * i + 2), make_event(club, semester, 4 * i + 2)]
+            history.append((timezone.now(), standings()))
+        for score, event in zip([20, 0, 20, 3], events[::2]):
+            event.planning_score = score
+            event.save()
+            history.append((timezone.now(), standings()))
+        events[-1].delete()
+        history.append((timezone.now(), standings()))
+
+    # Every past state is rebuilt exactly, however many checkpoints lie between
+    snapshots = list(RankingSnapshot.objects.filter(semester=semester))
+    assert sum(s.is_checkpoint for s in snapshots) > 1
+    assert all(s.changes_since_checkpoint <= 4 for s in snapshots)
+    for when, expected in history:
+        rows = rankings_as_of(semester, when)
+        assert {row['club_id']: (row['rank'], row['tier'], row['cps'], row['event_count']) for row in rows} == expected
+    assert rankings_as_of(semester, before) is None
+    # Checkpoint, deltas and club names: three indexed queries
+    with django_assert_num_queries(3):
+        rankings_as_of(semester, history[5][0])
+
+    client.force_login(User.objects.create_user('member', 'member@example.com', 'password'))
+    url = reverse('api_semester_rankings', args=[semester.pk])
+    response = client.get(url, {'as_of': history[3][0].isoformat(), 'fields': 'club_id,rank', 'format': 'compact'})
+    assert response.json()['rows'] == [
+        [clubs[3].pk, 1], [clubs[2].pk, 2], [clubs[1].pk, 3], [clubs[0].pk, 4],
+    ]
+    assert client.get(url, {'as_of': before.isoformat()}).status_code == 404
+    assert client.get(url, {'as_of': 'yesterday'}).status_code == 400
+    assert len(client.get(url, {'as_of': timezone.localdate().isoformat()}).json()['results']) == 4
+
+@pytest.mark.django_db
+def test_ranking_stream_pushes_snapshot_deltas(client, async_client, settings, django_capture_on_commit_callbacks):
+    import asyncio
+    import json
+    from asgiref.sync import async_to_sync, sync_to_async
+    from core.live import broadcaster
+    from core.models import RankingSnapshot
+
+    settings.CTR_LIVE_POLL_INTERVAL = 0.01
+    semester = Semester.objects.create(name="Fall 2023", is_active=True)
+    clubs = [
+        Club.objects.create(name=f"Club {i}", short_code=f"C{i}", faculty_incharge="F", student_lead="S")
+        for i in range(2)
+    ]
+    events = [make_event(club, semester, 10) for club in clubs for _ in range(2)]
+    user = User.objects.create_user('member', 'member@example.com', 'password')
+    client.force_login(user)
+    async_client.force_login(user)
+    url = reverse('ranking_stream', args=[semester.pk])
+
+    # The dashboard starts the stream after the snapshot its table shows
+    last = RankingSnapshot.objects.filter(semester=semester).latest('pk').pk
+    with django_capture_on_commit_callbacks(execute=True):
+        dashboard = client.get(reverse('dashboard'))
+    assert f'{url}?after={last}'.encode() in dashboard.content
+    assert f'data-club="{clubs[0].pk}"'.encode() in dashboard.content
+
+    # Sync workers answer with what's new since then and let the browser poll
+    response = client.get(url, {'after': 0})
+    assert response['Content-Type'] == 'text/event-stream'
+    body = response.content.decode()
+    assert body.startswith('retry: 5000\n\n')
+    assert body.count('event: rankings') == RankingSnapshot.objects.filter(semester=semester).count()
+    assert client.get(url, {'after': last}).content == b'retry: 5000\n\n'
+    assert client.get(url, HTTP_LAST_EVENT_ID='x').status_code == 400
+
+    def raise_second_club():
+        events[2].planning_score = 20
+        events[2].save()
+
+    async def listen():
+        # Two open dashboards on one ASGI worker share a single poller
+        responses = await asyncio.gather(*(async_client.get(url, {'after': last}) for _ in range(2)))
+        streams = [response.streaming_content.__aiter__() for response in responses]
+        assert [await stream.__anext__() for stream in streams] == [b'retry: 5000\n\n'] * 2
+        assert len(broadcaster.subscribers[semester.pk]) == 2
+        await sync_to_async(raise_second_club)()
+        received = [await asyncio.wait_for(stream.__anext__(), 5) for stream in streams]
+        for stream in streams:
+            await stream.aclose()
+        return received
+
+    first, second = async_to_sync(listen)()
+    assert first == second
+    event_id, event, data = first.decode().strip().split('\n')
+    assert event_id == f'id: {RankingSnapshot.objects.latest("pk").pk}'
+    assert event == 'event: rankings'
+    rows = json.loads(data.removeprefix('data: '))['rows']
+    assert rows[str(clubs[1].pk)][:2] == [1, 'D']
+    assert rows[str(clubs[0].pk)][0] == 2
+    assert semester.pk not in broadcaster.subscribers
+
+@pytest.mark.django_db(transaction=True)
+def test_sqlite_production_profile(settings):
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+    from core.sqlite import optimize_if_due
+
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        pragmas = {
+            name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'temp_store', 'mmap_size')
+        }
+    assert pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'temp_store': 2, 'mmap_size': 134217728}
+
+    # Write transactions take the write lock up front
+    with CaptureQueriesContext(connection) as ctx, transaction.atomic():
+        Semester.objects.create(name="Fall 2023", is_active=True)
+    assert ctx.captured_queries[0]['sql'] == 'BEGIN IMMEDIATE'
+
+    # PRAGMA optimize runs once a connection has been in use for the interval
+    settings.CTR_SQLITE_OPTIMIZE_INTERVAL = 60
+    assert not optimize_if_due(connection)
+    connection.optimized_at -= 61
+    assert optimize_if_due(connection)
+    assert not optimize_if_due(connection)
+    settings.CTR_SQLITE_OPTIMIZE_INTERVAL = 0
+    connection.optimized_at -= 61
+    assert not optimize_if_due(connection)
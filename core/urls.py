@@ -1,11 +1,21 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
     path('login/', auth_views.LoginView.as_view(template_name='core/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path('club/<int:pk>/', views.ClubDetailView.as_view(), name='club_detail'),
+    path('club/<int:pk>/events.json', views.club_events_json, name='club_events_json'),
+    path('club/<int:pk>/history/', views.ClubHistoryView.as_view(), name='club_history'),
     path('export/', views.export_rankings_csv, name='export_rankings'),
+    path('export/events/', views.export_events_csv, name='export_events'),
+    path('live/<int:semester_id>/', views.ranking_stream, name='ranking_stream'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('simulate/<int:semester_id>/', views.simulate_rankings, name='simulate_rankings'),
+    path('api/semesters/', api.semesters, name='api_semesters'),
+    path('api/semesters/<int:semester_id>/rankings/', api.semester_rankings, name='api_semester_rankings'),
+    path('api/clubs/<int:pk>/', api.club_detail, name='api_club_detail'),
+    path('api/clubs/<int:pk>/events/', api.club_events, name='api_club_events'),
 ]
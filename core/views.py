@@ -1,97 +1,412 @@
-from django.shortcuts import render, get_object_or_404
-from django.views.generic import ListView, DetailView, TemplateView
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
+from django.views.generic import DetailView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, F
-from .models import Club, Ranking, Semester, Event
+from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from .models import Club, ClubHistory, Ranking, Semester, Event
+from .caching import get_cached_rankings
+from .history import HISTORY_WINDOW
+from .jobs import aranking_pending_since
+from .live import POLL_RETRY_MS, latest_snapshot_id, ranking_events, snapshot_events
+from .scoring import METRICS
+from .metrics import registry
+from .simulation import simulate
 import csv
-from django.http import HttpResponse
+import datetime
+import hashlib
+import hmac
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, Http404, JsonResponse, StreamingHttpResponse
+from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
 
-class DashboardView(LoginRequiredMixin, ListView):
-    model = Ranking
+def pick_semester(semesters, semester_id):
+    """
+    The requested semester, else the active one, else the most recent.
+    """
+    if semester_id:
+        selected = next((s for s in semesters if str(s.pk) == semester_id), None)
+        if selected is None:
+            raise Http404("Semester not found")
+        return selected
+    return next((s for s in semesters if s.is_active), None) or (semesters[-1] if semesters else None)
+
+def get_semester_choices(semester_id):
+    """
+    Loads the semester dropdown once and picks the selected semester from it.
+    """
+    semesters = list(Semester.objects.order_by('pk'))
+    return semesters, pick_semester(semesters, semester_id)
+
+async def aget_semester_choices(semester_id):
+    semesters = [semester async for semester in Semester.objects.order_by('pk')]
+    return semesters, pick_semester(semesters, semester_id)
+
+# Events per page on the club detail page and the default for the JSON endpoint
+EVENTS_PAGE_SIZE = 25
+MAX_EVENTS_PAGE_SIZE = 100
+
+def parse_cursor(value):
+    """
+    Decodes a "<date>.<id>" keyset cursor. Raises BadRequest if it's invalid.
+    """
+    try:
+        date, pk = value.split('.')
+        return datetime.date.fromisoformat(date), int(pk)
+    except ValueError:
+        raise BadRequest("Invalid cursor")
+
+def make_cursor(event):
+    return f"{event.date.isoformat()}.{event.pk}"
+
+def keyset_query(events, after=None, before=None, size=EVENTS_PAGE_SIZE):
+    """
+    The query behind keyset_page: one row more than the page, to tell
+    whether there is another page beyond it.
+    """
+    if before:
+        date, pk = parse_cursor(before)
+        return events.filter(Q(date__lt=date) | Q(date=date, id__lt=pk)).order_by('-date', '-id')[:size + 1]
+    if after:
+        date, pk = parse_cursor(after)
+        events = events.filter(Q(date__gt=date) | Q(date=date, id__gt=pk))
+    return events.order_by('date', 'id')[:size + 1]
+
+def keyset_result(rows, after=None, before=None, size=EVENTS_PAGE_SIZE):
+    has_more = len(rows) > size
+    if before:
+        page = rows[:size][::-1]
+        return page, (make_cursor(page[0]) if has_more else None), (make_cursor(page[-1]) if page else None)
+    page = rows[:size]
+    previous = make_cursor(page[0]) if after and page else None
+    return page, previous, (make_cursor(page[-1]) if has_more else None)
+
+def keyset_page(events, after=None, before=None, size=EVENTS_PAGE_SIZE):
+    """
+    One page of `events` in (date, id) order, starting after the `after`
+    cursor or ending before the `before` cursor. Seeks on the index instead
+    of counting past skipped rows, so every page costs the same. Returns
+    (events, previous cursor, next cursor); a cursor is None at either end.
+    """
+    rows = list(keyset_query(events, after, before, size))
+    return keyset_result(rows, after, before, size)
+
+async def akeyset_page(events, after=None, before=None, size=EVENTS_PAGE_SIZE):
+    rows = [event async for event in keyset_query(events, after, before, size)]
+    return keyset_result(rows, after, before, size)
+
+EVENT_FIELDS = [
+    'id', 'name', 'date', 'expected_turnout', 'actual_turnout',
+    *(f'{metric}_score' for metric in METRICS), 'total_score',
+]
+
+def club_events_page(request, club_id, semester):
+    """
+    The page of a club's events in `semester` that the request asks for with
+    ?after=<cursor> (or before=<cursor>)&limit=<n>, for the JSON endpoints:
+    (rows as dicts of EVENT_FIELDS, previous cursor, next cursor). Raises
+    BadRequest for an invalid limit or cursor.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', EVENTS_PAGE_SIZE)), 1), MAX_EVENTS_PAGE_SIZE)
+    except ValueError:
+        raise BadRequest("Invalid limit")
+    if semester is None:
+        return [], None, None
+    events, previous_cursor, next_cursor = keyset_page(
+        Event.objects.filter(club_id=club_id, semester=semester).with_total_score(),
+        after=request.GET.get('after'), before=request.GET.get('before'), size=limit,
+    )
+    rows = [
+        {
+            **{field: getattr(event, field) for field in EVENT_FIELDS[:-1]},
+            'date': event.date.isoformat(), 'total_score': event.total,
+        }
+        for event in events
+    ]
+    return rows, previous_cursor, next_cursor
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    LoginRequiredMixin for views with async handlers. The user is loaded
+    with request.auser() and put back on the request, so the templates
+    don't look it up again with a blocking query.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+class DashboardView(AsyncLoginRequiredMixin, TemplateView):
     template_name = 'core/dashboard.html'
-    context_object_name = 'rankings'
-
-    def get_queryset(self):
-        semester_id = self.request.GET.get('semester')
-        # Use F() expression to sort NULL ranks (Pending) last
-        qs = Ranking.objects.none()
-
-        if semester_id:
-            qs = Ranking.objects.filter(semester__id=semester_id)
-        else:
-            # Default to most recent or active semester
-            active_semester = Semester.objects.filter(is_active=True).first()
-            if active_semester:
-                 qs = Ranking.objects.filter(semester=active_semester)
-            else:
-                # Fallback to any semester
-                latest_semester = Semester.objects.last()
-                if latest_semester:
-                     qs = Ranking.objects.filter(semester=latest_semester)
-
-        return qs.order_by(F('rank').asc(nulls_last=True), '-cps')
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['semesters'] = Semester.objects.all()
-        selected_semester_id = self.request.GET.get('semester')
-        if selected_semester_id:
-            context['selected_semester'] = Semester.objects.get(id=selected_semester_id)
-        elif Semester.objects.filter(is_active=True).exists():
-            context['selected_semester'] = Semester.objects.filter(is_active=True).first()
-        else:
-            context['selected_semester'] = Semester.objects.last()
-        return context
+    async def get(self, request, *args, **kwargs):
+        semesters, selected_semester = await aget_semester_choices(request.GET.get('semester'))
+        context = self.get_context_data(semesters=semesters, selected_semester=selected_semester)
+        if not selected_semester:
+            context.update(rankings=[], ranking_version=None)
+            return self.render_to_response(context)
 
-class ClubDetailView(LoginRequiredMixin, DetailView):
-    model = Club
+        # Rankings only change through services.py, which bumps the version
+        # stored on the semester in the same transaction; unchanged pages are
+        # answered with 304 Not Modified
+        ranking_version = selected_semester.ranking_version
+        # Queued recalculations (CTR_RANKING_QUEUE) show as pending until the
+        # worker's run bumps the version
+        pending_since = await aranking_pending_since(selected_semester.pk)
+        semesters_key = ','.join(f"{s.pk}:{s.name}:{s.is_active}" for s in semesters)
+        etag = quote_etag(hashlib.md5(
+            f"{request.user.pk}|{ranking_version}|{pending_since}|{semesters_key}".encode()
+        ).hexdigest())
+        last_modified = ranking_version // 1000
+        if pending_since:
+            last_modified = max(last_modified, int(pending_since.timestamp()))
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            context['ranking_version'] = ranking_version
+            # Only evaluated when the cached table fragment in the template
+            # misses; the template is rendered in a worker thread
+            context['rankings'] = SimpleLazyObject(lambda: get_cached_rankings(selected_semester, ranking_version))
+            context['ranking_pending'] = pending_since is not None
+            context['last_snapshot'] = SimpleLazyObject(lambda: latest_snapshot_id(selected_semester.pk))
+            response = self.render_to_response(context)
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        # The page greets the user, so only the browser may keep it, and must revalidate
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+class ClubDetailView(AsyncLoginRequiredMixin, TemplateView):
     template_name = 'core/club_detail.html'
+
+    async def get(self, request, pk):
+        club = await aget_object_or_404(Club, pk=pk)
+        semesters, semester = await aget_semester_choices(request.GET.get('semester'))
+        context = self.get_context_data(club=club, selected_semester=semester, semesters=semesters)
+
+        if semester:
+            context['ranking'] = await Ranking.objects.filter(club=club, semester=semester).afirst()
+            context['events'], context['previous_cursor'], context['next_cursor'] = await akeyset_page(
+                Event.objects.filter(club=club, semester=semester).with_total_score(),
+                after=request.GET.get('after'), before=request.GET.get('before'),
+            )
+
+        return self.render_to_response(context)
+
+@login_required
+def club_events_json(request, pk):
+    """
+    A club's events in a semester, one keyset page at a time:
+    ?semester=<id>&after=<cursor> (or before=<cursor>)&limit=<n>.
+    """
+    club = get_object_or_404(Club, pk=pk)
+    semesters, semester = get_semester_choices(request.GET.get('semester'))
+    events, previous_cursor, next_cursor = club_events_page(request, club.pk, semester)
+    return JsonResponse({
+        'club': club.pk,
+        'semester': semester.pk if semester else None,
+        'events': events,
+        'previous': previous_cursor,
+        'next': next_cursor,
+    })
+
+class ClubHistoryView(LoginRequiredMixin, DetailView):
+    """
+    A club's CPS, tier and rank in every semester with trends, read from
+    the precomputed ClubHistory table in one query.
+    """
+    model = Club
+    template_name = 'core/club_history.html'
     context_object_name = 'club'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        semester_id = self.request.GET.get('semester')
+        context['history'] = (
+            ClubHistory.objects.filter(club=self.object).select_related('semester').order_by('semester_id')
+        )
+        context['window'] = HISTORY_WINDOW
+        return context
 
-        if semester_id:
-            semester = get_object_or_404(Semester, id=semester_id)
-        else:
-             # Default logic same as dashboard
-            semester = Semester.objects.filter(is_active=True).first() or Semester.objects.last()
+# Rows fetched per database round trip when exporting
+EXPORT_CHUNK_SIZE = 2000
 
-        context['selected_semester'] = semester
-        context['semesters'] = Semester.objects.all()
+class Echo:
+    """
+    File-like object whose write() hands the line back, so csv.writer can
+    format rows for a streaming response.
+    """
+    def write(self, value):
+        return value
 
-        if semester:
-            context['ranking'] = Ranking.objects.filter(club=self.object, semester=semester).first()
-            context['events'] = Event.objects.filter(club=self.object, semester=semester)
+def stream_csv(header, rows, lines_per_chunk=500):
+    """
+    Yields CSV text for a StreamingHttpResponse in chunks of a few hundred
+    lines, so memory stays flat no matter how many rows are exported.
+    """
+    writer = csv.writer(Echo())
+    chunk = [writer.writerow(header)]
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= lines_per_chunk:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
 
-        return context
+async def astream_csv(header, rows, lines_per_chunk=500):
+    """
+    stream_csv for an async iterator of rows, leaving the event loop free
+    between database round trips.
+    """
+    writer = csv.writer(Echo())
+    chunk = [writer.writerow(header)]
+    async for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= lines_per_chunk:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+def csv_response(request, filename, header, queryset, fields, convert):
+    """
+    Streams `fields` of `queryset` as a CSV attachment, each row passed
+    through `convert`. Under ASGI the rows come from aiterator(); under WSGI
+    from iterator(), since Django would read an async iterator to the end
+    into memory before sending anything.
+    """
+    if isinstance(request, ASGIRequest):
+        # Plain values_list() runs its query in the event loop when iterated
+        # with aiterator(); the named variant defers it to the worker thread
+        rows = queryset.values_list(*fields, named=True).aiterator(chunk_size=EXPORT_CHUNK_SIZE)
+        content = astream_csv(header, (convert(row) async for row in rows))
+    else:
+        rows = queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        content = stream_csv(header, map(convert, rows))
+    response = StreamingHttpResponse(content, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
-def export_rankings_csv(request):
+async def export_rankings_csv(request):
     semester_id = request.GET.get('semester')
     if not semester_id:
         return HttpResponse("Semester not specified", status=400)
 
-    semester = get_object_or_404(Semester, id=semester_id)
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="rankings_{semester.name}.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Rank', 'Club', 'CPS', 'Tier', 'Events', 'Avg Planning', 'Avg Execution', 'Avg Doc', 'Avg Innovation', 'Avg Turnout'])
-
-    rankings = Ranking.objects.filter(semester=semester).order_by('rank')
-    for r in rankings:
-        writer.writerow([
-            r.rank if r.rank else 'Pending',
-            r.club.name,
-            f"{r.cps:.2f}",
-            r.tier,
-            r.event_count,
-            f"{r.avg_planning:.2f}",
-            f"{r.avg_execution:.2f}",
-            f"{r.avg_documentation:.2f}",
-            f"{r.avg_innovation:.2f}",
-            f"{r.avg_turnout:.2f}",
-        ])
+    semester = await aget_object_or_404(Semester, id=semester_id)
 
+    def convert(row):
+        rank, name, cps, tier, event_count, *averages = row
+        return [rank if rank else 'Pending', name, f"{cps:.2f}", tier, event_count] + [f"{avg:.2f}" for avg in averages]
+
+    return csv_response(
+        request, f"rankings_{semester.name}.csv",
+        ['Rank', 'Club', 'CPS', 'Tier', 'Events', 'Avg Planning', 'Avg Execution', 'Avg Doc', 'Avg Innovation', 'Avg Turnout'],
+        Ranking.objects.filter(semester=semester).order_by('rank'),
+        ['rank', 'club__name', 'cps', 'tier', 'event_count',
+         'avg_planning', 'avg_execution', 'avg_documentation', 'avg_innovation', 'avg_turnout'],
+        convert,
+    )
+
+@login_required
+async def export_events_csv(request):
+    """
+    Raw per-event scores for analytics. Exports the semesters given as
+    ?semester=<id> (repeatable), or every semester when none are given.
+    """
+    events = Event.objects.all()
+    semester_ids = request.GET.getlist('semester')
+    if semester_ids:
+        if not all(semester_id.isdigit() for semester_id in semester_ids):
+            return HttpResponse("Invalid semester", status=400)
+        events = events.filter(semester_id__in=semester_ids)
+
+    return csv_response(
+        request, "events.csv",
+        ['Semester', 'Club Code', 'Club', 'Event', 'Date', 'Expected Turnout', 'Actual Turnout',
+         'Planning', 'Execution', 'Documentation', 'Innovation', 'Turnout', 'Total'],
+        events.order_by('semester_id', 'club_id', 'date', 'id'),
+        ['semester__name', 'club__short_code', 'club__name', 'name', 'date',
+         'expected_turnout', 'actual_turnout',
+         'planning_score', 'execution_score', 'documentation_score', 'innovation_score', 'turnout_score'],
+        lambda row: tuple(row) + (sum(row[-5:]),),
+    )
+
+@login_required
+async def ranking_stream(request, semester_id):
+    """
+    Server-sent events with each change to a semester's standings, for the
+    live dashboard: ?after=<snapshot id> (or Last-Event-ID on reconnect).
+    Under ASGI the stream stays open; sync workers can't afford a blocked
+    worker per dashboard, so they answer with what's new and the browser
+    polls again after a few seconds.
+    """
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.GET.get('after') or 0)
+    except ValueError:
+        return HttpResponse("Invalid snapshot id", status=400)
+    semester = await aget_object_or_404(Semester, pk=semester_id)
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(ranking_events(semester.pk, after), content_type='text/event-stream')
+    else:
+        events = await sync_to_async(snapshot_events)(semester.pk, after)
+        response = HttpResponse(
+            f"retry: {POLL_RETRY_MS}\n\n" + ''.join(event for _, event in events), content_type='text/event-stream',
+        )
+    response['Cache-Control'] = 'no-cache'
+    # Keeps nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
     return response
+
+def has_bearer_token(request, token):
+    """
+    Whether the request sends `Authorization: Bearer <token>`; always False
+    when no token is configured.
+    """
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+def metrics_view(request):
+    """
+    Request and signal handler stats in the Prometheus text format, for staff
+    or a scraper sending `Authorization: Bearer <CTR_METRICS_TOKEN>`.
+    """
+    if not (request.user.is_staff or has_bearer_token(request, settings.CTR_METRICS_TOKEN)):
+        return HttpResponseForbidden("Forbidden")
+    response = HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    patch_cache_control(response, no_store=True)
+    return response
+
+# Keeps a single request well inside the "hundreds of scenarios" budget
+MAX_SIMULATION_SCENARIOS = 1000
+
+@staff_member_required
+@require_POST
+def simulate_rankings(request, semester_id):
+    """
+    What-if rankings for a semester under alternative weights and tier
+    thresholds. Takes a JSON body {"scenarios": [...], "top": 10} (see
+    core.simulation.parse_scenarios) and never writes to Ranking.
+    """
+    semester = get_object_or_404(Semester, pk=semester_id)
+    try:
+        body = json.loads(request.body)
+        specs = body['scenarios']
+        top = int(body.get('top', 10))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected a JSON object with a "scenarios" list.'}, status=400)
+    if isinstance(specs, list) and len(specs) > MAX_SIMULATION_SCENARIOS:
+        return JsonResponse({'error': f'At most {MAX_SIMULATION_SCENARIOS} scenarios per request.'}, status=400)
+    try:
+        return JsonResponse(simulate(semester, specs, top=max(0, top)))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,8 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -78,13 +80,66 @@ WSGI_APPLICATION = "ctr_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Under ASGI (uvicorn workers) set DB_CONN_MAX_AGE=0: each request runs its
+# queries in its own thread, so persistent connections pile up instead of
+# being reused.
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600
+        conn_max_age=int(os.environ.get("DB_CONN_MAX_AGE", 600))
     )
 }
 
+# SQLite test databases default to a shared-cache in-memory database, whose
+# table locks fail concurrent writers at once instead of letting them wait;
+# the ranking stress test needs the file locking production uses. The file
+# is named per process, so parallel test runs and the benchmark commands'
+# throwaway databases never drop each other's.
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["TEST"] = {"NAME": os.path.join(tempfile.gettempdir(), f"ctr_test_{os.getpid()}.sqlite3")}
+
+# SQLite production profile (DB_SQLITE_PROFILE=default keeps SQLite's own
+# defaults). WAL lets dashboard reads run while an event save writes, and
+# synchronous=NORMAL syncs at checkpoints rather than every commit, so a
+# power cut (not an app crash) can lose the last commits. Write transactions
+# take the write lock at BEGIN IMMEDIATE and wait up to busy_timeout for it,
+# instead of failing with "database is locked" when two of them try to
+# upgrade a read lock at once. `manage.py bench_sqlite` compares the two.
+SQLITE_PRODUCTION_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",
+    "init_command": ";".join([
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-20000",  # 20 MB page cache per connection
+        "PRAGMA mmap_size=134217728",  # read through a 128 MB memory map
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA analysis_limit=1000",  # bounds the ANALYZE run by PRAGMA optimize
+    ]),
+}
+DB_SQLITE_PROFILE = os.environ.get("DB_SQLITE_PROFILE", "production")
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3" and DB_SQLITE_PROFILE == "production":
+    DATABASES["default"].setdefault("OPTIONS", {}).update(SQLITE_PRODUCTION_OPTIONS)
+
+
+# Cache
+# Local memory by default; set CACHE_DIR to share cached rankings between
+# gunicorn workers through the file-based backend.
+
+if os.environ.get("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -171,3 +226,41 @@ JAZZMIN_UI_TWEAKS = {
     "sidebar": "sidebar-dark-primary",
     "sidebar_nav_child_hide_on_collapse": True,
 }
+
+# CTR scoring engine
+# Apply per-event deltas to the running sums on Ranking instead of
+# re-aggregating all of a club's events on every save.
+CTR_INCREMENTAL_CPS = os.environ.get("CTR_INCREMENTAL_CPS", "True") == "True"
+
+# Audit log entries are queued in process and written in batches after the
+# request, every CTR_AUDIT_FLUSH_INTERVAL seconds or once CTR_AUDIT_BATCH_SIZE
+# are waiting. At CTR_AUDIT_QUEUE_SIZE the writer flushes synchronously.
+CTR_AUDIT_BUFFERED = os.environ.get("CTR_AUDIT_BUFFERED", "True") == "True"
+CTR_AUDIT_BATCH_SIZE = int(os.environ.get("CTR_AUDIT_BATCH_SIZE", "50"))
+CTR_AUDIT_QUEUE_SIZE = int(os.environ.get("CTR_AUDIT_QUEUE_SIZE", "1000"))
+CTR_AUDIT_FLUSH_INTERVAL = float(os.environ.get("CTR_AUDIT_FLUSH_INTERVAL", "2.0"))
+
+# Per-view latency and query counts, served at /metrics (staff or
+# CTR_METRICS_TOKEN as a bearer token). Stats are per process.
+CTR_METRICS_ENABLED = os.environ.get("CTR_METRICS_ENABLED", "True") == "True"
+CTR_METRICS_RECENT_REQUESTS = int(os.environ.get("CTR_METRICS_RECENT_REQUESTS", "1000"))
+CTR_METRICS_TOKEN = os.environ.get("CTR_METRICS_TOKEN", "")
+
+# Machine clients of the read-only JSON API (/api/) may send this as a bearer
+# token instead of logging in.
+CTR_API_TOKEN = os.environ.get("CTR_API_TOKEN", "")
+
+# Ranking queue: with CTR_RANKING_QUEUE=True event saves only queue a
+# recalculation and `manage.py run_ranking_worker` does it after the request.
+# A worker that stops mid-job leaves it to others after CTR_RANKING_JOB_TIMEOUT seconds.
+CTR_RANKING_QUEUE = os.environ.get("CTR_RANKING_QUEUE", "False") == "True"
+CTR_RANKING_JOB_TIMEOUT = int(os.environ.get("CTR_RANKING_JOB_TIMEOUT", "300"))
+
+# Live dashboards (/live/<semester>/): each worker process checks for new
+# ranking snapshots this often while any dashboard is connected to it.
+CTR_LIVE_POLL_INTERVAL = float(os.environ.get("CTR_LIVE_POLL_INTERVAL", "1.0"))
+
+# SQLite: each persistent connection runs PRAGMA optimize this often (after
+# a request, or when the ranking worker is idle) so the query planner's
+# statistics follow the data. 0 turns it off.
+CTR_SQLITE_OPTIMIZE_INTERVAL = int(os.environ.get("CTR_SQLITE_OPTIMIZE_INTERVAL", "300"))